@@ -1,6 +1,14 @@
-import time
+import sys
 
+from .cache import is_known_miss, record_miss
+from .catalog import get_local_catalog
+from .coalesce import add_items
+from .pacing import pace
+from .paginate import fetch_all_pages
+from .tracing import span, traced
 
+
+@traced('parse')
 def parse_album_input(album_input):
     """
     Parses album input in "Album - Artist" format.
@@ -19,6 +27,7 @@ def parse_album_input(album_input):
         return album_input.strip(), None
 
 
+@traced('search')
 def search_album(sp, album_name, artist_name=None, auto_select=False):
     """
     Searches for an album on Spotify.
@@ -32,6 +41,17 @@ def search_album(sp, album_name, artist_name=None, auto_select=False):
     Returns:
         Album object if found, None otherwise
     """
+    catalog = get_local_catalog()
+    if catalog:
+        album = catalog.find_album(album_name, artist_name)
+        if album:
+            artist_names = ', '.join([artist['name'] for artist in album['artists']])
+            print(f"Found: {album['name']} by {artist_names} (local catalog)")
+            return album
+    
+    if is_known_miss('album', album_name, artist_name):
+        return None
+    
     # Build search query
     if artist_name:
         query = f"album:{album_name} artist:{artist_name}"
@@ -55,8 +75,9 @@ def search_album(sp, album_name, artist_name=None, auto_select=False):
                 artist_names = ', '.join([artist['name'] for artist in album['artists']])
                 print(f"{i}. {album['name']} by {artist_names} ({album['total_tracks']} tracks)")
             
-            if auto_select:
-                # Auto-select the first one
+            if auto_select or not sys.stdin.isatty():
+                # Auto-select the first one, also when nobody is at a
+                # terminal to answer a prompt
                 selected = albums[0]
                 artist_names = ', '.join([artist['name'] for artist in selected['artists']])
                 print(f"\n→ Auto-selected: {selected['name']} by {artist_names}")
@@ -74,9 +95,11 @@ def search_album(sp, album_name, artist_name=None, auto_select=False):
                     except ValueError:
                         print("Please enter a valid number")
     
+    record_miss('album', album_name, artist_name)
     return None
 
 
+@traced('fetch tracks')
 def get_album_tracks(sp, album_id):
     """
     Gets all tracks from an album.
@@ -89,18 +112,13 @@ def get_album_tracks(sp, album_id):
         List of track URIs
     """
     track_uris = []
-    results = sp.album_tracks(album_id)
+    tracks = fetch_all_pages(
+        lambda offset, limit: sp.album_tracks(album_id, limit=limit, offset=offset), 50
+    )
     
-    while results:
-        for track in results['items']:
-            print(f"  - {track['name']}")
-            track_uris.append(track['uri'])
-        
-        if results['next']:
-            time.sleep(0.5)
-            results = sp.next(results)
-        else:
-            break
+    for track in tracks:
+        print(f"  - {track['name']}")
+        track_uris.append(track['uri'])
     
     return track_uris
 
@@ -140,13 +158,13 @@ def add_album_to_playlist(sp, playlist_id, album_input, auto_select=False):
     
     print(f"\nAdding {len(track_uris)} tracks to playlist...")
     
-    try:
-        sp.playlist_add_items(playlist_id, track_uris)
-        print(f"✓ Added {len(track_uris)} tracks")
-        return len(track_uris)
-    except Exception as e:
-        print(f"✗ Error adding tracks: {e}")
-        return 0
+    with span('write'):
+        result = add_items(sp, playlist_id, track_uris)
+    if result['errors']:
+        print(f"✗ Error adding tracks: {'; '.join(result['errors'])}")
+    if result['added']:
+        print(f"✓ Added {result['added']} tracks")
+    return result['added']
 
 
 def add_albums_from_file(sp, playlist_id, file_path, auto_select=False):
@@ -163,7 +181,7 @@ def add_albums_from_file(sp, playlist_id, file_path, auto_select=False):
         Total number of tracks added
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with span('parse'), open(file_path, 'r', encoding='utf-8') as f:
             albums = [line.strip() for line in f if line.strip()]
     except FileNotFoundError:
         print(f"✗ File not found: {file_path}")
@@ -183,12 +201,13 @@ def add_albums_from_file(sp, playlist_id, file_path, auto_select=False):
         print(f"\n[{i}/{len(albums)}] Processing: {album}")
         print("-" * 50)
         
-        added = add_album_to_playlist(sp, playlist_id, album, auto_select=auto_select)
+        with span(album, 'line'):
+            added = add_album_to_playlist(sp, playlist_id, album, auto_select=auto_select)
         total_added += added
         
         if i < len(albums):
             print("\nWaiting 3 seconds before next album...")
-            time.sleep(3)
+            pace(3)
     
     return total_added
 
@@ -196,6 +215,9 @@ def add_albums_from_file(sp, playlist_id, file_path, auto_select=False):
 if __name__ == "__main__":
     from core.auth import connect_spotify
     from core.playlist import get_or_create_playlist
+    from core.tracing import profile_from_args
+    
+    profile_from_args("Add albums to a Spotify playlist")
     
     try:
         sp = connect_spotify()
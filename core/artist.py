@@ -1,6 +1,14 @@
-import time
+import sys
 
+from .cache import is_known_miss, record_miss
+from .catalog import get_local_catalog
+from .pacing import pace
+from .paginate import fetch_all_pages
+from .playlist import add_tracks_in_batches
+from .tracing import span, traced
 
+
+@traced('search')
 def search_artist(sp, artist_name, auto_select=False):
     """
     Searches for an artist on Spotify.
@@ -13,6 +21,16 @@ def search_artist(sp, artist_name, auto_select=False):
     Returns:
         Artist object if found, None otherwise
     """
+    catalog = get_local_catalog()
+    if catalog:
+        artist = catalog.find_artist(artist_name)
+        if artist:
+            print(f"Found: {artist['name']} (local catalog)")
+            return artist
+    
+    if is_known_miss('artist', artist_name):
+        return None
+    
     results = sp.search(q=f"artist:{artist_name}", type='artist', limit=5)
     
     if results['artists']['items']:
@@ -30,8 +48,9 @@ def search_artist(sp, artist_name, auto_select=False):
                 followers = artist['followers']['total']
                 print(f"{i}. {artist['name']} ({followers:,} followers)")
             
-            if auto_select:
-                # Auto-select the first one (highest followers)
+            if auto_select or not sys.stdin.isatty():
+                # Auto-select the first one (highest followers), also when
+                # nobody is at a terminal to answer a prompt
                 selected = artists[0]
                 print(f"\n→ Auto-selected: {selected['name']} ({selected['followers']['total']:,} followers)")
                 return selected
@@ -48,9 +67,11 @@ def search_artist(sp, artist_name, auto_select=False):
                     except ValueError:
                         print("Please enter a valid number")
     
+    record_miss('artist', artist_name)
     return None
 
 
+@traced('fetch tracks')
 def get_artist_top_tracks(sp, artist_id, limit=10):
     """
     Gets the top tracks for an artist (up to 10).
@@ -90,55 +111,52 @@ def get_all_artist_tracks(sp, artist_id):
     
     # Get all albums
     print("  Fetching albums...")
-    albums = []
-    results = sp.artist_albums(artist_id, album_type='album,single', limit=50)
-    
-    while results:
-        albums.extend(results['items'])
-        if results['next']:
-            time.sleep(0.5)  # Small delay between pagination
-            results = sp.next(results)
-        else:
-            break
-    
-    print(f"  Found {len(albums)} albums/singles")
-    
-    # Get tracks from each album
-    album_ids = [album['id'] for album in albums]
-    
-    # Process in batches of 20 (Spotify API limit)
-    for i in range(0, len(album_ids), 20):
-        batch = album_ids[i:i+20]
-        albums_data = sp.albums(batch)
+    with span('fetch albums'):
+        # All pages at once: the first one reports how many releases there are
+        albums = fetch_all_pages(
+            lambda offset, limit: sp.artist_albums(artist_id, album_type='album,single', limit=limit, offset=offset),
+            50
+        )
+        
+        print(f"  Found {len(albums)} albums/singles")
         
-        for album in albums_data['albums']:
-            for track in album['tracks']['items']:
-                # Check if artist is in the track (to avoid features)
-                track_artists = [artist['id'] for artist in track['artists']]
-                if artist_id in track_artists:
-                    tracks.append({
-                        'name': track['name'],
-                        'uri': track['uri'],
-                        'popularity': 0  # Will be updated below
-                    })
+        # Get tracks from each album
+        album_ids = [album['id'] for album in albums]
         
-        if i + 20 < len(album_ids):
-            time.sleep(0.5)  # Delay between batches
+        # Process in batches of 20 (Spotify API limit)
+        for i in range(0, len(album_ids), 20):
+            batch = album_ids[i:i+20]
+            albums_data = sp.albums(batch)
+            
+            for album in albums_data['albums']:
+                for track in album['tracks']['items']:
+                    # Check if artist is in the track (to avoid features)
+                    track_artists = [artist['id'] for artist in track['artists']]
+                    if artist_id in track_artists:
+                        tracks.append({
+                            'name': track['name'],
+                            'uri': track['uri'],
+                            'popularity': 0  # Will be updated below
+                        })
+            
+            if i + 20 < len(album_ids):
+                pace(0.5)  # Delay between batches
     
     # Get popularity for each track (in batches of 50)
     print(f"  Getting popularity for {len(tracks)} tracks...")
-    track_ids = [track['uri'].split(':')[2] for track in tracks]
-    
-    for i in range(0, len(track_ids), 50):
-        batch = track_ids[i:i+50]
-        tracks_data = sp.tracks(batch)
-        
-        for j, track_data in enumerate(tracks_data['tracks']):
-            if track_data:
-                tracks[i + j]['popularity'] = track_data.get('popularity', 0)
+    with span('popularity'):
+        track_ids = [track['uri'].split(':')[2] for track in tracks]
         
-        if i + 50 < len(track_ids):
-            time.sleep(0.5)  # Delay between batches
+        for i in range(0, len(track_ids), 50):
+            batch = track_ids[i:i+50]
+            tracks_data = sp.tracks(batch)
+            
+            for j, track_data in enumerate(tracks_data['tracks']):
+                if track_data:
+                    tracks[i + j]['popularity'] = track_data.get('popularity', 0)
+            
+            if i + 50 < len(track_ids):
+                pace(0.5)  # Delay between batches
     
     return tracks
 
@@ -172,6 +190,36 @@ def get_top_n_tracks(sp, artist_id, n):
     return track_uris
 
 
+def get_artist_track_uris(sp, artist_id, mode='top10', custom_n=None):
+    """
+    Gets the track URIs an artist contributes in the given mode.
+    
+    Args:
+        sp: Spotify client object
+        artist_id: Spotify artist ID
+        mode: 'top10', 'topn', or 'all'
+        custom_n: Number of songs if mode is 'topn'
+    
+    Returns:
+        List of track URIs, or None if the mode or number is invalid
+    """
+    if mode == 'top10':
+        return get_artist_top_tracks(sp, artist_id, limit=10)
+    elif mode == 'topn':
+        if not custom_n or custom_n <= 0:
+            print("✗ Invalid number specified")
+            return None
+        return get_top_n_tracks(sp, artist_id, custom_n)
+    elif mode == 'all':
+        all_tracks = get_all_artist_tracks(sp, artist_id)
+        track_uris = [track['uri'] for track in all_tracks]
+        print(f"\n  All {len(track_uris)} tracks will be added")
+        return track_uris
+    else:
+        print("✗ Invalid mode")
+        return None
+
+
 def add_artist_songs_to_playlist(sp, playlist_id, artist_name, mode='top10', custom_n=None, auto_select=False):
     """
     Adds songs from an artist to a playlist.
@@ -198,20 +246,9 @@ def add_artist_songs_to_playlist(sp, playlist_id, artist_name, mode='top10', cus
     artist_name = artist['name']
     
     print(f"\nFetching songs from {artist_name}...")
+    track_uris = get_artist_track_uris(sp, artist_id, mode, custom_n)
     
-    if mode == 'top10':
-        track_uris = get_artist_top_tracks(sp, artist_id, limit=10)
-    elif mode == 'topn':
-        if not custom_n or custom_n <= 0:
-            print("✗ Invalid number specified")
-            return 0
-        track_uris = get_top_n_tracks(sp, artist_id, custom_n)
-    elif mode == 'all':
-        all_tracks = get_all_artist_tracks(sp, artist_id)
-        track_uris = [track['uri'] for track in all_tracks]
-        print(f"\n  All {len(track_uris)} tracks will be added")
-    else:
-        print("✗ Invalid mode")
+    if track_uris is None:
         return 0
     
     if not track_uris:
@@ -219,22 +256,7 @@ def add_artist_songs_to_playlist(sp, playlist_id, artist_name, mode='top10', cus
         return 0
     
     print(f"\nAdding {len(track_uris)} songs to playlist...")
-    
-    # Add in batches of 100 (Spotify limit)
-    added = 0
-    for i in range(0, len(track_uris), 100):
-        batch = track_uris[i:i+100]
-        try:
-            sp.playlist_add_items(playlist_id, batch)
-            added += len(batch)
-            print(f"✓ Added {len(batch)} songs ({added}/{len(track_uris)})")
-            
-            if i + 100 < len(track_uris):
-                time.sleep(2)  # Delay between batches
-        except Exception as e:
-            print(f"✗ Error adding batch: {e}")
-    
-    return added
+    return add_tracks_in_batches(sp, playlist_id, track_uris)
 
 
 def add_artists_from_file(sp, playlist_id, file_path, mode='top10', custom_n=None, auto_select=False):
@@ -253,7 +275,7 @@ def add_artists_from_file(sp, playlist_id, file_path, mode='top10', custom_n=Non
         Total number of songs added
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with span('parse'), open(file_path, 'r', encoding='utf-8') as f:
             artists = [line.strip() for line in f if line.strip()]
     except FileNotFoundError:
         print(f"✗ File not found: {file_path}")
@@ -273,12 +295,13 @@ def add_artists_from_file(sp, playlist_id, file_path, mode='top10', custom_n=Non
         print(f"\n[{i}/{len(artists)}] Processing: {artist}")
         print("-" * 50)
         
-        added = add_artist_songs_to_playlist(sp, playlist_id, artist, mode, custom_n, auto_select=auto_select)
+        with span(artist, 'line'):
+            added = add_artist_songs_to_playlist(sp, playlist_id, artist, mode, custom_n, auto_select=auto_select)
         total_added += added
         
         if i < len(artists):
             print("\nWaiting 3 seconds before next artist...")
-            time.sleep(3)
+            pace(3)
     
     return total_added
 
@@ -286,6 +309,9 @@ def add_artists_from_file(sp, playlist_id, file_path, mode='top10', custom_n=Non
 if __name__ == "__main__":
     from core.auth import connect_spotify
     from core.playlist import get_or_create_playlist
+    from core.tracing import profile_from_args
+    
+    profile_from_args("Add songs by artist to a Spotify playlist")
     
     try:
         sp = connect_spotify()
@@ -1,15 +1,15 @@
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 
+from .client import wrap_client
+
 # Load environment variables from .env file
 load_dotenv()
 
 def connect_spotify():
     """
     Connects to Spotify using credentials from environment variables.
-    Returns a spotipy.Spotify object.
+    Returns a wrapped spotipy.Spotify object (see core.client).
     """
     client_id = os.getenv("SPOTIPY_CLIENT_ID")
     client_secret = os.getenv("SPOTIPY_CLIENT_SECRET")
@@ -18,14 +18,18 @@ def connect_spotify():
     if not client_id or not client_secret or not redirect_uri:
         raise ValueError("Missing Spotify credentials. Please check your .env file.")
 
+    # Imported here so importing core/ stays fast when no client is needed
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
     scope = "playlist-modify-public playlist-modify-private"
 
-    sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
+    sp = wrap_client(spotipy.Spotify(auth_manager=SpotifyOAuth(
         client_id=client_id,
         client_secret=client_secret,
         redirect_uri=redirect_uri,
         scope=scope
-    ))
+    )))
     
     user = sp.current_user()
     print(f"Connected to Spotify as: {user['display_name']}")
@@ -33,6 +37,10 @@ def connect_spotify():
     return sp
 
 if __name__ == "__main__":
+    from core.tracing import profile_from_args
+    
+    profile_from_args("Check the Spotify connection")
+    
     try:
         connect_spotify()
     except Exception as e:
@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from .metrics import CACHE_REQUESTS
+
+
+DEFAULT_PATH = '.lookup_cache.sqlite3'
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 50000
+# "No match" outcomes expire sooner than hits: the catalog or our matching may improve
+DEFAULT_NEGATIVE_TTL = 6 * 60 * 60
+
+NEGATIVE_PREFIX = 'miss|'
+
+# Expired and overflow rows are swept once every this many writes
+_SWEEP_EVERY = 200
+
+
+class LookupCache:
+    """
+    Shared cache of Spotify lookups backed by one SQLite file.
+
+    The file is opened in WAL mode, so every gunicorn worker (and any CLI run
+    on the same machine) reads and writes the same store concurrently.
+    Each write is a single atomic INSERT OR REPLACE; entries expire after
+    their TTL and the oldest entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS lookups ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' expires REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS lookups_expires ON lookups (expires)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Looks up a cached value.
+
+        Args:
+            key: Cache key string
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        try:
+            row = self._connect().execute(
+                'SELECT value FROM lookups WHERE key = ? AND expires > ?',
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value.
+
+        Args:
+            key: Cache key string
+            value: JSON-serialisable value
+            ttl: Seconds until the entry expires (default: the cache TTL)
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO lookups (key, value, expires) VALUES (?, ?, ?)',
+                (key, json.dumps(value, separators=(',', ':')), expires)
+            )
+            self._writes += 1
+            if self._writes % _SWEEP_EVERY == 0:
+                self.sweep()
+        except sqlite3.Error:
+            pass
+
+    def sweep(self):
+        """Deletes expired entries and evicts the oldest beyond max_entries."""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM lookups WHERE expires <= ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM lookups WHERE key IN ('
+                ' SELECT key FROM lookups ORDER BY expires'
+                ' LIMIT MAX(0, (SELECT COUNT(*) FROM lookups) - ?))',
+                (self.max_entries,)
+            )
+
+    def items(self, prefix=''):
+        """
+        Lists live entries whose key starts with prefix.
+
+        Returns:
+            List of (key, value, expires) tuples, soonest to expire first
+        """
+        rows = self._connect().execute(
+            'SELECT key, value, expires FROM lookups WHERE key >= ? AND key < ? AND expires > ? ORDER BY expires',
+            (prefix, prefix + '\U0010ffff', time.time())
+        ).fetchall()
+        return [(key, json.loads(value), expires) for key, value, expires in rows]
+
+    def delete(self, prefix):
+        """
+        Deletes every entry whose key starts with prefix.
+
+        Returns:
+            Number of entries deleted
+        """
+        cursor = self._connect().execute(
+            'DELETE FROM lookups WHERE key >= ? AND key < ?',
+            (prefix, prefix + '\U0010ffff')
+        )
+        return cursor.rowcount
+
+    def delete_key(self, key):
+        """
+        Deletes the entry with exactly this key.
+
+        Returns:
+            Number of entries deleted (0 or 1)
+        """
+        cursor = self._connect().execute('DELETE FROM lookups WHERE key = ?', (key,))
+        return cursor.rowcount
+
+    def clear(self):
+        """Deletes every entry."""
+        self._connect().execute('DELETE FROM lookups')
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_lookup_cache():
+    """
+    Returns the process-wide lookup cache configured from the environment.
+
+    LOOKUP_CACHE_PATH sets the SQLite file (empty disables the cache),
+    LOOKUP_CACHE_TTL the entry lifetime in seconds and
+    LOOKUP_CACHE_MAX_ENTRIES the size bound.
+
+    Returns:
+        LookupCache object, or None if caching is disabled or unavailable
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = os.getenv('LOOKUP_CACHE_PATH', DEFAULT_PATH)
+                if not path:
+                    _default = False
+                else:
+                    try:
+                        _default = LookupCache(
+                            path,
+                            ttl=int(os.getenv('LOOKUP_CACHE_TTL', DEFAULT_TTL)),
+                            max_entries=int(os.getenv('LOOKUP_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+                        )
+                    except (sqlite3.Error, ValueError) as e:
+                        print(f"✗ Lookup cache disabled: {e}")
+                        _default = False
+    return _default or None
+
+
+def normalize_query(*parts):
+    """
+    Normalizes query parts so trivial variations share one cache entry:
+    Unicode-normalized, case-folded, punctuation dropped, whitespace collapsed.
+
+    Returns:
+        Normalized string, non-empty parts joined with ' - '
+    """
+    normalized = []
+    for part in parts:
+        text = unicodedata.normalize('NFKC', part or '').casefold()
+        text = re.sub(r'[^\w\s]', ' ', text)
+        if text.strip():
+            normalized.append(' '.join(text.split()))
+    return ' - '.join(normalized)
+
+
+def _negative_key(kind, *parts):
+    """
+    Keys a "no match" outcome on the query as the searches compare it:
+    lower-cased and trimmed, nothing more. Looser normalization would let
+    a miss hide a spelling that does match (e.g. 'AC DC' vs 'AC/DC').
+
+    Returns:
+        Cache key, or None for an empty query
+    """
+    query = ' - '.join(part.strip().lower() for part in parts if part and part.strip())
+    return f'{NEGATIVE_PREFIX}{kind}|{query}' if query else None
+
+
+def is_known_miss(kind, *parts):
+    """
+    Checks whether a search recently found no match.
+
+    Args:
+        kind: 'song', 'isrc', 'artist' or 'album'
+        parts: Query parts, e.g. (song_name, artist_name)
+
+    Returns:
+        True if the same query (ignoring case) is cached as a miss
+    """
+    cache = get_lookup_cache()
+    key = _negative_key(kind, *parts)
+    if not cache or not key:
+        return False
+    hit = cache.get(key) is not None
+    CACHE_REQUESTS.inc(cache='negative', result='hit' if hit else 'miss')
+    return hit
+
+
+def record_miss(kind, *parts):
+    """
+    Remembers that a search found no match, for LOOKUP_CACHE_NEGATIVE_TTL
+    seconds (default: 6 hours).
+
+    Args:
+        kind: 'song', 'isrc', 'artist' or 'album'
+        parts: Query parts, e.g. (song_name, artist_name)
+    """
+    cache = get_lookup_cache()
+    key = _negative_key(kind, *parts)
+    if not cache or not key:
+        return
+    try:
+        ttl = int(os.getenv('LOOKUP_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL))
+    except ValueError:
+        ttl = DEFAULT_NEGATIVE_TTL
+    query = ' - '.join(part for part in parts if part)
+    cache.set(key, {'kind': kind, 'query': query, 'recorded_at': time.time()}, ttl=ttl)
+
+
+def list_misses(kind=None):
+    """
+    Lists cached "no match" outcomes.
+
+    Args:
+        kind: Only list this kind ('song', 'isrc', 'artist' or 'album')
+
+    Returns:
+        List of dicts with 'kind', 'query', 'recorded_at' and 'expires'
+    """
+    cache = get_lookup_cache()
+    if not cache:
+        return []
+    prefix = NEGATIVE_PREFIX + (f'{kind}|' if kind else '')
+    return [{**value, 'expires': expires} for _, value, expires in cache.items(prefix)]
+
+
+def purge_misses(kind=None, query=None):
+    """
+    Forgets cached "no match" outcomes so they are searched again.
+
+    Args:
+        kind: Only purge this kind ('song', 'isrc', 'artist' or 'album')
+        query: Only purge this query (needs kind), e.g. 'Song - Artist'
+
+    Returns:
+        Number of entries purged
+    """
+    cache = get_lookup_cache()
+    if not cache:
+        return 0
+    if query:
+        parts = (query,) if kind == 'artist' else query.split(' - ', 1)
+        key = _negative_key(kind, *parts)
+        return cache.delete_key(key) if key else 0
+    return cache.delete(NEGATIVE_PREFIX + (f'{kind}|' if kind else ''))
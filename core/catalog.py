@@ -0,0 +1,261 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+from .cache import normalize_query
+from .metrics import CACHE_REQUESTS
+
+
+DEFAULT_PATH = '.catalog.sqlite3'
+
+CATALOG_KINDS = ('track', 'artist', 'album')
+
+# Rows are written in transactions of this many entries while importing
+_IMPORT_BATCH = 5000
+
+
+class LocalCatalog:
+    """
+    Offline index of Spotify tracks, artists and albums in one SQLite file.
+
+    Built from dumps with import_dump(), then consulted by find_track(),
+    search_artist() and search_album() before they call the API. Names are
+    indexed by their normalized form (see core.cache.normalize_query), so
+    a lookup is one index probe and matches ignore case, punctuation and
+    spacing. Only exact name matches count; anything else falls back to
+    the live search.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' uri TEXT PRIMARY KEY,'
+                ' kind TEXT NOT NULL,'
+                ' name_key TEXT NOT NULL,'
+                ' artists_key TEXT NOT NULL,'
+                ' rank REAL NOT NULL,'
+                ' payload TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_name ON entries (kind, name_key, rank DESC)')
+            self._local.conn = conn
+        return conn
+
+    def _lookup(self, kind, name, artist_name=None):
+        """Returns the best-ranked entry with this exact normalized name, or None."""
+        try:
+            rows = self._connect().execute(
+                'SELECT artists_key, payload FROM entries WHERE kind = ? AND name_key = ? ORDER BY rank DESC LIMIT 50',
+                (kind, normalize_query(name))
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+
+        artist_key = normalize_query(artist_name) if artist_name else None
+        for artists_key, payload in rows:
+            # Same rule as the live search: the given artist must appear in
+            # one of the entry's artist names
+            if artist_key and not any(artist_key in artist for artist in artists_key.split('\n')):
+                continue
+            CACHE_REQUESTS.inc(cache='catalog', result='hit')
+            return json.loads(payload)
+        CACHE_REQUESTS.inc(cache='catalog', result='miss')
+        return None
+
+    def find_track(self, song_name, artist_name=None):
+        """
+        Looks up a track by name and (optionally) artist.
+
+        Returns:
+            Track object, or None if the catalog has no match
+        """
+        return self._lookup('track', song_name, artist_name)
+
+    def find_artist(self, artist_name):
+        """
+        Looks up an artist by name; the most followed one wins.
+
+        Returns:
+            Artist object, or None if the catalog has no match
+        """
+        return self._lookup('artist', artist_name)
+
+    def find_album(self, album_name, artist_name=None):
+        """
+        Looks up an album by name and (optionally) artist.
+
+        Returns:
+            Album object, or None if the catalog has no match
+        """
+        return self._lookup('album', album_name, artist_name)
+
+    def import_dump(self, file_path, kind=None):
+        """
+        Adds the entries of a dump file to the catalog, replacing entries
+        with the same URI. The file is read incrementally.
+
+        JSONL dumps hold one Spotify track, artist or album object per line
+        (as returned by the Web API; playlist items are unwrapped). CSV and
+        TSV dumps need a header row with 'uri' (or 'id') and 'name', plus
+        'artists' (separated by ';') for tracks and albums and optionally
+        'album', 'popularity', 'followers', 'total_tracks' and
+        'release_date'.
+
+        Args:
+            file_path: Path to a .jsonl, .csv or .tsv file
+            kind: 'track', 'artist' or 'album'; required for CSV/TSV, and
+                taken from each object's 'type' for JSONL if omitted
+
+        Returns:
+            Number of entries imported
+
+        Raises:
+            ValueError: If the format or kind can't be determined
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in ('.jsonl', '.ndjson'):
+            objects = _read_jsonl(file_path)
+        elif extension in ('.csv', '.tsv'):
+            if kind not in CATALOG_KINDS:
+                raise ValueError(f"CSV and TSV dumps need a kind ({', '.join(CATALOG_KINDS)})")
+            objects = _read_table(file_path, kind, '\t' if extension == '.tsv' else ',')
+        else:
+            raise ValueError(f"Unsupported dump format: {extension or file_path}")
+
+        conn = self._connect()
+        count = 0
+        rows = []
+        for obj in objects:
+            row = _entry_row(obj, kind or obj.get('type'))
+            if row:
+                rows.append(row)
+            if len(rows) >= _IMPORT_BATCH:
+                count += self._write(conn, rows)
+                rows = []
+        count += self._write(conn, rows)
+        return count
+
+    def _write(self, conn, rows):
+        if rows:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(
+                    'INSERT OR REPLACE INTO entries (uri, kind, name_key, artists_key, rank, payload)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+        return len(rows)
+
+    def counts(self):
+        """Returns the number of entries per kind."""
+        rows = self._connect().execute('SELECT kind, COUNT(*) FROM entries GROUP BY kind').fetchall()
+        return {kind: count for kind, count in rows}
+
+
+def _read_jsonl(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            # Playlist item dumps wrap each track
+            if isinstance(obj.get('track'), dict):
+                obj = obj['track']
+            yield obj
+
+
+def _read_table(file_path, kind, delimiter):
+    """Builds minimal Spotify-shaped objects from CSV/TSV rows."""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            uri = (row.get('uri') or '').strip()
+            if not uri and row.get('id'):
+                uri = f"spotify:{kind}:{row['id'].strip()}"
+            if not uri or not row.get('name'):
+                continue
+            obj = {'type': kind, 'uri': uri, 'id': uri.rsplit(':', 1)[-1], 'name': row['name'].strip()}
+            artists = [name.strip() for name in (row.get('artists') or '').split(';') if name.strip()]
+            if kind == 'artist':
+                obj['followers'] = {'total': int(row.get('followers') or 0)}
+                obj['genres'] = [g.strip() for g in (row.get('genres') or '').split(';') if g.strip()]
+            else:
+                obj['artists'] = [{'name': name} for name in artists]
+            if kind == 'track':
+                obj['popularity'] = int(row.get('popularity') or 0)
+                if row.get('album'):
+                    obj['album'] = {'name': row['album'].strip()}
+            if kind == 'album':
+                obj['total_tracks'] = int(row.get('total_tracks') or 0)
+                obj['release_date'] = row.get('release_date') or ''
+            yield obj
+
+
+def _entry_row(obj, kind):
+    """Returns the catalog row for a Spotify object, or None if unusable."""
+    if kind not in CATALOG_KINDS or not obj.get('uri') or not obj.get('name'):
+        return None
+    if kind == 'artist':
+        artists = [obj['name']]
+        rank = (obj.get('followers') or {}).get('total') or 0
+    else:
+        artists = [artist['name'] for artist in obj.get('artists', [])]
+        rank = obj.get('popularity') or 0
+    return (
+        obj['uri'],
+        kind,
+        normalize_query(obj['name']),
+        '\n'.join(normalize_query(name) for name in artists),
+        rank,
+        json.dumps(obj, separators=(',', ':'))
+    )
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def catalog_path():
+    """
+    Returns the local catalog's SQLite file from CATALOG_PATH (default:
+    .catalog.sqlite3), or None if CATALOG_PATH is set but empty, which
+    disables the catalog.
+    """
+    return os.getenv('CATALOG_PATH', DEFAULT_PATH) or None
+
+
+def get_local_catalog():
+    """
+    Returns the process-wide local catalog, if one has been built.
+
+    CATALOG_PATH sets the SQLite file (default: .catalog.sqlite3; empty
+    disables the catalog). A missing file means no catalog, so nothing
+    changes until 'main.py catalog import' has been run.
+
+    Returns:
+        LocalCatalog object, or None
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = catalog_path()
+                if not path or not os.path.exists(path):
+                    _default = False
+                else:
+                    try:
+                        _default = LocalCatalog(path)
+                    except sqlite3.Error as e:
+                        print(f"✗ Local catalog disabled: {e}")
+                        _default = False
+    return _default or None
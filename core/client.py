@@ -0,0 +1,259 @@
+import hashlib
+import threading
+import time
+
+from .cache import get_lookup_cache
+from .metrics import CACHE_REQUESTS, SPOTIFY_CALLS, SPOTIFY_LATENCY, SPOTIFY_RATE_LIMITED, note_call
+from .ratelimit import get_rate_limiter
+from .resilience import circuit_wait, get_circuit_breaker, get_hedger, is_upstream_failure
+from .singleflight import SingleFlight
+from .tracing import span
+
+
+# Catalog reads whose results don't depend on who is asking.
+# Identical concurrent calls to these are coalesced into one request.
+COALESCED_METHODS = {
+    'search',
+    'albums',
+    'album_tracks',
+    'artist_albums',
+    'artist_related_artists',
+    'artist_top_tracks',
+    'tracks',
+    'next',
+}
+
+# Catalog metadata that changes rarely enough to serve from the shared
+# lookup cache (see core.cache) across requests, runs and workers.
+CACHED_METHODS = {
+    'search',
+    'album',
+    'albums',
+    'album_tracks',
+    'track',
+    'tracks',
+    'artist_albums',
+    'artist_top_tracks',
+    'next',
+}
+
+# Idempotent reads that may be hedged (sent twice when slow, see
+# core.resilience). Writes are never hedged.
+HEDGED_METHODS = COALESCED_METHODS | CACHED_METHODS | {
+    'artist',
+    'artists',
+    'current_user',
+    'current_user_playlists',
+    'playlist',
+    'playlist_items',
+}
+
+# The current user's profile is cached per token, in-process and in the
+# lookup cache, so greetings and create_playlist() don't refetch it
+PROFILE_TTL = 6 * 60 * 60
+_MAX_PROFILES = 1024
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+# Only pages of these catalog listings are coalesced or cached through
+# next(); playlist and library pages are per-user and change often.
+_CATALOG_PREFIXES = (
+    'https://api.spotify.com/v1/albums/',
+    'https://api.spotify.com/v1/artists/',
+    'https://api.spotify.com/v1/search',
+    'https://api.spotify.com/v1/tracks',
+)
+
+# Shared by every client in the process, so concurrent web requests
+# from different users coalesce too.
+_flight = SingleFlight()
+
+
+def _call_key(name, args, kwargs):
+    """
+    Builds a hashable key for a Spotify call.
+
+    Returns:
+        Tuple key, or None if the call can't be coalesced
+    """
+    if name == 'next':
+        url = args[0].get('next') if args and args[0] else None
+        if not url or not url.startswith(_CATALOG_PREFIXES):
+            return None
+        return (name, url)
+    return (name, repr(args), repr(sorted(kwargs.items())))
+
+
+class SpotifyClient:
+    """
+    Thin wrapper around a spotipy.Spotify client.
+
+    Behaves exactly like the wrapped client; every method call goes
+    through _call(), which serves catalog reads from the shared lookup
+    cache, coalesces identical concurrent reads and records call counts
+    and latencies in core.metrics.
+
+    Upstream calls wait for the process-wide rate limiter (see
+    core.ratelimit) with this client's priority, on behalf of its token's
+    user, so interactive calls overtake bulk ones and users share fairly.
+    """
+
+    def __init__(self, sp, cache=None, priority='interactive'):
+        self._sp = sp
+        self._cache = cache
+        self.priority = priority
+        self._user = None
+
+    def __getattr__(self, name):
+        attr = getattr(self._sp, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        def method(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+
+        return method
+
+    def _token_key(self):
+        """
+        Returns a hash identifying the token this client uses, or None.
+        Only the cached token is consulted, never the network.
+        """
+        token = getattr(self._sp, '_auth', None)
+        if not token:
+            manager = getattr(self._sp, 'auth_manager', None)
+            cache_handler = getattr(manager, 'cache_handler', None)
+            info = cache_handler.get_cached_token() if cache_handler else None
+            if info:
+                # The refresh token outlives hourly access token refreshes
+                token = info.get('refresh_token') or info.get('access_token')
+        if not token:
+            return None
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def current_user(self):
+        """
+        Gets the current user's profile, cached per token.
+
+        Returns:
+            User profile dictionary
+        """
+        key = self._token_key()
+        cache_key = f'current_user|{key}'
+        profile = _profiles.get(key) if key else None
+        if profile is None and key and self._cache:
+            profile = self._cache.get(cache_key)
+            CACHE_REQUESTS.inc(cache='profile', result='miss' if profile is None else 'hit')
+        if profile is None:
+            profile = self._invoke('current_user', self._sp.current_user, (), {})
+            if key and self._cache:
+                self._cache.set(cache_key, profile, ttl=PROFILE_TTL)
+        if key:
+            with _profiles_lock:
+                if len(_profiles) >= _MAX_PROFILES:
+                    _profiles.clear()
+                _profiles[key] = profile
+        return profile
+
+    def _invoke(self, name, func, args, kwargs):
+        if self._user is None:
+            self._user = self._token_key() or ''
+        return _invoke(name, func, args, kwargs, self.priority, self._user)
+
+    def _call(self, name, func, args, kwargs):
+        if name not in COALESCED_METHODS and name not in CACHED_METHODS:
+            return self._invoke(name, func, args, kwargs)
+
+        key = _call_key(name, args, kwargs)
+        if key is None:
+            return self._invoke(name, func, args, kwargs)
+
+        cache = self._cache if name in CACHED_METHODS else None
+        cache_key = '|'.join(key) if cache else None
+        if cache:
+            cached = cache.get(cache_key)
+            CACHE_REQUESTS.inc(cache='lookup', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
+        def fetch():
+            result = self._invoke(name, func, args, kwargs)
+            if cache and result is not None:
+                cache.set(cache_key, result)
+            return result
+
+        if name not in COALESCED_METHODS:
+            return fetch()
+        # Only calls of the same priority share a flight: an interactive
+        # caller joining a bulk leader would wait in the bulk queue
+        result, shared = _flight.do((self.priority,) + key, fetch)
+        CACHE_REQUESTS.inc(cache='singleflight', result='hit' if shared else 'miss')
+        return result
+
+
+def _invoke(name, func, args, kwargs, priority='interactive', user=None):
+    """
+    Makes one upstream call, recording its outcome and latency.
+
+    The call waits for the circuit breaker and the rate limiter first, and
+    slow idempotent reads are hedged (see core.resilience).
+    """
+    breaker = get_circuit_breaker()
+    probe = breaker.before_call(*circuit_wait(priority)) if breaker else False
+    ok = None
+    try:
+        limiter = get_rate_limiter()
+        if limiter:
+            limiter.acquire(priority, user)
+        note_call()
+        hedger = get_hedger() if name in HEDGED_METHODS else None
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            with span(name, 'spotify'):
+                if hedger:
+                    before_hedge = (lambda: limiter.acquire(priority, user)) if limiter else None
+                    result = hedger.call(name, lambda: func(*args, **kwargs), before_hedge)
+                else:
+                    result = func(*args, **kwargs)
+        except Exception as e:
+            http_status = getattr(e, 'http_status', None)
+            status = str(http_status) if http_status else 'error'
+            if http_status == 429:
+                SPOTIFY_RATE_LIMITED.inc(method=name)
+            ok = not is_upstream_failure(e)
+            raise
+        finally:
+            SPOTIFY_LATENCY.observe(time.perf_counter() - start, method=name)
+            SPOTIFY_CALLS.inc(method=name, status=status)
+        ok = True
+        return result
+    finally:
+        # Also when the call never got an answer, so a probe can't stay
+        # claimed forever
+        if breaker:
+            breaker.record(ok, probe)
+
+
+def wrap_client(sp, priority=None):
+    """
+    Wraps a spotipy client so core/ and web/ share cached and in-flight
+    catalog reads, and its catalog GETs go through the HTTP response
+    cache (see core.httpcache).
+
+    Args:
+        sp: spotipy.Spotify object (or an already wrapped client)
+        priority: 'interactive' or 'bulk' (default: unchanged, or
+            'interactive' for a new client)
+
+    Returns:
+        SpotifyClient object
+    """
+    if isinstance(sp, SpotifyClient):
+        if priority:
+            sp.priority = priority
+        return sp
+    # Imported here: it needs requests, which only comes with spotipy
+    from .httpcache import install_http_cache
+    install_http_cache(sp)
+    return SpotifyClient(sp, cache=get_lookup_cache(), priority=priority or 'interactive')
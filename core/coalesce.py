@@ -0,0 +1,155 @@
+import threading
+from collections import deque
+
+from .metrics import PLAYLIST_ADD_ITEMS
+
+
+# Spotify's limit for one playlist_add_items call
+BATCH_SIZE = 100
+
+
+class _Pending:
+    """One caller's items waiting to be added."""
+
+    def __init__(self, uris):
+        self.uris = uris
+        self.landed = [False] * len(uris)
+        self.settled = [False] * len(uris)
+        self.errors = []
+        self.remaining = len(uris)
+        self.snapshot_id = None
+
+    def result(self):
+        return {
+            'added': sum(self.landed),
+            'landed': self.landed,
+            'errors': self.errors,
+            'snapshot_id': self.snapshot_id,
+        }
+
+
+class WriteCoalescer:
+    """
+    Merges concurrent appends to the same playlist into full calls.
+
+    Callers queue their items per playlist (and per token, so every item is
+    added by the user who asked for it). One caller at a time sends the
+    queue's head in calls of up to 100 items, including other callers'
+    items; the rest wait. Each caller's items stay in order and contiguous,
+    and calls to one playlist never overlap, so they don't race on its
+    snapshot_id.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self._changed = threading.Condition()
+        self._queues = {}
+        self._flushing = set()
+
+    def add(self, sp, playlist_id, uris):
+        """
+        Appends items to a playlist, sharing calls with concurrent callers.
+
+        Args:
+            sp: Spotify client object
+            playlist_id: ID of the playlist
+            uris: Track URIs, added in order
+
+        Returns:
+            Dictionary with 'added' (count), 'landed' (one bool per URI),
+            'errors' (messages of failed calls) and 'snapshot_id' (after
+            the last call that carried this caller's items)
+        """
+        pending = _Pending(list(uris))
+        if not pending.uris:
+            return pending.result()
+        token_key = getattr(sp, '_token_key', None)
+        key = (playlist_id, token_key() if token_key else None)
+
+        with self._changed:
+            queue = self._queues.setdefault(key, deque())
+            queue.extend((pending, i) for i in range(len(pending.uris)))
+
+        while True:
+            with self._changed:
+                while pending.remaining and key in self._flushing:
+                    self._changed.wait()
+                if not pending.remaining:
+                    return pending.result()
+                self._flushing.add(key)
+            try:
+                self._flush(sp, playlist_id, key, pending)
+            finally:
+                with self._changed:
+                    self._flushing.discard(key)
+                    if not self._queues.get(key, True):
+                        del self._queues[key]
+                    self._changed.notify_all()
+
+    def _flush(self, sp, playlist_id, key, pending):
+        """Sends the queue's head until the given caller's items are all sent."""
+        while pending.remaining:
+            with self._changed:
+                queue = self._queues[key]
+                batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+            if not batch:
+                # Shouldn't happen: every popped item is settled below
+                lost = [(pending, i) for i, settled in enumerate(pending.settled) if not settled]
+                self._settle(lost, None, "Items were lost from the queue")
+                break
+            try:
+                self._send(sp, playlist_id, batch)
+            finally:
+                # Popped items must be settled even if the send was
+                # interrupted (KeyboardInterrupt, a gevent Timeout), or
+                # their callers would wait for them forever
+                self._settle(batch, None, "Interrupted before the items were sent")
+                with self._changed:
+                    self._changed.notify_all()
+
+    def _send(self, sp, playlist_id, batch):
+        uris = [caller.uris[i] for caller, i in batch]
+        try:
+            response = sp.playlist_add_items(playlist_id, uris)
+        except Exception as e:
+            status = getattr(e, 'http_status', None)
+            callers = list(dict.fromkeys(caller for caller, _ in batch))
+            if len(callers) > 1 and status is not None and 400 <= status < 500 and status != 429:
+                # Probably one caller's bad item: don't fail everyone else's
+                for caller in callers:
+                    self._send(sp, playlist_id, [item for item in batch if item[0] is caller])
+                return
+            self._settle(batch, None, str(e))
+            return
+        PLAYLIST_ADD_ITEMS.observe(len(uris))
+        self._settle(batch, (response or {}).get('snapshot_id'), None)
+
+    def _settle(self, batch, snapshot_id, error):
+        """Records the outcome of items not settled yet."""
+        with self._changed:
+            for caller, i in batch:
+                if caller.settled[i]:
+                    continue
+                caller.settled[i] = True
+                caller.remaining -= 1
+                if error is None:
+                    caller.landed[i] = True
+                    caller.snapshot_id = snapshot_id
+                elif error not in caller.errors:
+                    caller.errors.append(error)
+
+
+# Shared by every client in the process, so concurrent web requests and
+# jobs adding to one playlist share calls
+_coalescer = WriteCoalescer()
+
+
+def add_items(sp, playlist_id, uris):
+    """
+    Appends tracks to a playlist through the process-wide WriteCoalescer.
+
+    Returns:
+        Dictionary with 'added', 'landed', 'errors' and 'snapshot_id'
+        (see WriteCoalescer.add())
+    """
+    return _coalescer.add(sp, playlist_id, uris)
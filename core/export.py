@@ -0,0 +1,220 @@
+import csv
+import importlib.util
+import json
+import os
+
+from .paginate import iter_pages
+from .tracing import span
+
+
+EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+
+# One row per playlist item, in this column order
+EXPORT_COLUMNS = (
+    'playlist_id', 'position', 'added_at', 'added_by', 'is_local',
+    'track_id', 'uri', 'name', 'artists', 'album', 'isrc', 'popularity', 'duration_ms'
+)
+
+STATE_FILE = '.export_state.json'
+
+_ITEM_FIELDS = (
+    'items(added_at,added_by(id),is_local,'
+    'track(id,uri,name,popularity,duration_ms,external_ids(isrc),artists(name),album(name))),'
+    'total,next'
+)
+
+
+def item_row(playlist_id, position, item):
+    """
+    Flattens one playlist item into an export row.
+
+    Args:
+        playlist_id: ID of the playlist
+        position: Position of the item in the playlist
+        item: Playlist item object from playlist_items()
+
+    Returns:
+        Dictionary with the EXPORT_COLUMNS keys
+    """
+    track = item.get('track') or {}
+    return {
+        'playlist_id': playlist_id,
+        'position': position,
+        'added_at': item.get('added_at'),
+        'added_by': (item.get('added_by') or {}).get('id'),
+        'is_local': bool(item.get('is_local')),
+        'track_id': track.get('id'),
+        'uri': track.get('uri'),
+        'name': track.get('name'),
+        'artists': '; '.join(artist['name'] for artist in track.get('artists') or []),
+        'album': (track.get('album') or {}).get('name'),
+        'isrc': (track.get('external_ids') or {}).get('isrc'),
+        'popularity': track.get('popularity'),
+        'duration_ms': track.get('duration_ms'),
+    }
+
+
+class _JsonlWriter:
+    def __init__(self, path):
+        self._f = open(path, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self._f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._f.close()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._f = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._f, fieldnames=EXPORT_COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetWriter:
+    """Writes one Parquet row group per page; needs pyarrow."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([
+            ('playlist_id', pa.string()), ('position', pa.int64()), ('added_at', pa.string()),
+            ('added_by', pa.string()), ('is_local', pa.bool_()), ('track_id', pa.string()),
+            ('uri', pa.string()), ('name', pa.string()), ('artists', pa.string()),
+            ('album', pa.string()), ('isrc', pa.string()), ('popularity', pa.int64()),
+            ('duration_ms', pa.int64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        if rows:
+            self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_WRITERS = {'jsonl': _JsonlWriter, 'csv': _CsvWriter, 'parquet': _ParquetWriter}
+
+
+def export_playlist(sp, playlist_id, file_path, output_format='jsonl', concurrency=4):
+    """
+    Streams every item of a playlist to a file, page by page.
+
+    Pages are fetched concurrently and written as they arrive in order, so
+    memory use stays flat however long the playlist is. The file is
+    written under a temporary name and renamed when complete.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        file_path: Output file path
+        output_format: 'jsonl', 'csv' or 'parquet' (needs pyarrow)
+        concurrency: Pages fetched at once
+
+    Returns:
+        Number of items written
+    """
+    temp_path = file_path + '.part'
+    writer = _WRITERS[output_format](temp_path)
+    count = 0
+    try:
+        pages = iter_pages(
+            lambda offset, limit: sp.playlist_items(playlist_id, fields=_ITEM_FIELDS, limit=limit, offset=offset),
+            100,
+            concurrency
+        )
+        for page in pages:
+            with span('write export'):
+                writer.write([item_row(playlist_id, count + i, item) for i, item in enumerate(page['items'])])
+            count += len(page['items'])
+    except BaseException:
+        writer.close()
+        os.remove(temp_path)
+        raise
+    writer.close()
+    os.replace(temp_path, file_path)
+    return count
+
+
+def _read_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path, state):
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.part', path)
+
+
+def export_playlists(sp, playlists, output_dir, output_format='jsonl', force=False, concurrency=4):
+    """
+    Exports playlists to one file each in output_dir, skipping playlists
+    whose snapshot_id matches the last export recorded there.
+
+    Args:
+        sp: Spotify client object
+        playlists: List of dicts with 'id', 'name' and 'snapshot_id'
+            (e.g. from list_user_playlists())
+        output_dir: Directory for <playlist_id>.<format> files and the
+            export state
+        output_format: 'jsonl', 'csv' or 'parquet'
+        force: If True, exports even unchanged playlists
+        concurrency: Pages fetched at once per playlist
+
+    Returns:
+        List of result dicts with 'id', 'name', 'status' ('exported',
+        'unchanged' or 'error'), 'items' and 'path'
+
+    Raises:
+        ValueError: If the format is unknown or parquet lacks pyarrow
+    """
+    if output_format not in _WRITERS:
+        raise ValueError(f"Unknown export format: {output_format}")
+    if output_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_FILE)
+    state = _read_state(state_path)
+    results = []
+
+    for playlist in playlists:
+        playlist_id = playlist['id']
+        path = os.path.join(output_dir, f"{playlist_id}.{output_format}")
+        snapshot_id = playlist.get('snapshot_id')
+        previous = state.get(playlist_id, {})
+        result = {'id': playlist_id, 'name': playlist['name'], 'items': previous.get('items'), 'path': path}
+
+        if (not force and snapshot_id and previous.get('snapshot_id') == snapshot_id
+                and previous.get('format') == output_format and os.path.exists(path)):
+            print(f"- {playlist['name']}: unchanged, skipped")
+            results.append({**result, 'status': 'unchanged'})
+            continue
+
+        try:
+            count = export_playlist(sp, playlist_id, path, output_format, concurrency)
+        except Exception as e:
+            print(f"✗ {playlist['name']}: {e}")
+            results.append({**result, 'status': 'error', 'error': str(e)})
+            continue
+
+        print(f"✓ {playlist['name']}: {count} items → {path}")
+        state[playlist_id] = {'snapshot_id': snapshot_id, 'format': output_format, 'items': count}
+        _write_state(state_path, state)
+        results.append({**result, 'status': 'exported', 'items': count})
+
+    return results
@@ -0,0 +1,105 @@
+import json
+
+from .plan import build_plan, plan_uris
+from .playlist import add_tracks_in_batches
+from .shard import build_plan_sharded
+
+
+OUTPUT_FORMATS = ('text', 'json', 'jsonl')
+
+
+def run_batch(sp, lines, batch_type, playlist_id, mode='top10', custom_n=None, concurrency=1, dedupe=False,
+              workers=1, rate=3.0):
+    """
+    Resolves and adds a batch of songs, artists or albums without prompting.
+    Multiple matches are always auto-selected.
+
+    Args:
+        sp: Spotify client object
+        lines: List or iterable of input lines (materialized when
+            workers > 1, since shards need the whole list)
+        batch_type: 'songs', 'artists', or 'albums'
+        playlist_id: ID of the playlist to add to
+        mode: Artist mode ('top10', 'topn', or 'all')
+        custom_n: Number of songs per artist if mode is 'topn'
+        concurrency: Number of lines resolved at once (per worker process)
+        dedupe: If True, adds each track only once
+        workers: Number of processes resolving lines; above 1 they share
+            one budget of `rate` calls per second (see core.shard)
+        rate: Spotify calls per second for all workers together
+
+    Returns:
+        Result dictionary with per-line outcomes and totals
+    """
+    if workers > 1:
+        lines = list(lines)
+        plan = build_plan_sharded(lines, batch_type, workers, mode, custom_n, rate=rate, concurrency=concurrency, sp=sp)
+    else:
+        plan = build_plan(sp, lines, batch_type, mode, custom_n, delay=0, concurrency=concurrency)
+    track_uris = plan_uris(plan, dedupe=dedupe)
+
+    added = 0
+    if track_uris:
+        print(f"\nAdding {len(track_uris)} tracks to playlist...")
+        added = add_tracks_in_batches(sp, playlist_id, track_uris)
+
+    results = []
+    for entry in plan['entries']:
+        if entry.get('error'):
+            status = 'error'
+        elif entry['uris']:
+            status = 'found'
+        else:
+            status = 'not_found'
+        result = {
+            'input': entry['input'],
+            'status': status,
+            'match': entry['match'],
+            'tracks': len(entry['uris'])
+        }
+        if entry.get('error'):
+            result['error'] = entry['error']
+        results.append(result)
+
+    return {
+        'type': batch_type,
+        'playlist_id': playlist_id,
+        'total': len(results),
+        'resolved': sum(1 for result in results if result['status'] == 'found'),
+        'tracks_found': len(track_uris),
+        'tracks_added': added,
+        'results': results
+    }
+
+
+def format_results(batch, output_format='text'):
+    """
+    Formats the result of run_batch().
+
+    Args:
+        batch: Result dictionary from run_batch()
+        output_format: 'text', 'json' (one document) or 'jsonl' (one object
+            per input line followed by a summary object)
+
+    Returns:
+        Formatted string
+    """
+    if output_format == 'json':
+        return json.dumps(batch, ensure_ascii=False, indent=2)
+
+    if output_format == 'jsonl':
+        summary = {key: value for key, value in batch.items() if key != 'results'}
+        lines = [json.dumps(result, ensure_ascii=False) for result in batch['results']]
+        lines.append(json.dumps({'summary': summary}, ensure_ascii=False))
+        return '\n'.join(lines)
+
+    lines = [
+        f"✓ Resolved {batch['resolved']}/{batch['total']} {batch['type']}",
+        f"✓ Added {batch['tracks_added']}/{batch['tracks_found']} tracks to {batch['playlist_id']}"
+    ]
+    failed = [result for result in batch['results'] if result['status'] != 'found']
+    if failed:
+        lines.append(f"✗ Failed ({len(failed)}):")
+        for result in failed:
+            lines.append(f"  - {result['input']}" + (f" ({result['error']})" if result.get('error') else ""))
+    return '\n'.join(lines)
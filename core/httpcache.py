@@ -0,0 +1,281 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from .metrics import CACHE_REQUESTS
+
+
+DEFAULT_PATH = '.http_cache.sqlite3'
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+# Catalog resources whose responses are the same for every user
+CACHEABLE_PREFIXES = (
+    'https://api.spotify.com/v1/albums',
+    'https://api.spotify.com/v1/artists',
+    'https://api.spotify.com/v1/tracks',
+)
+
+# The stored size is re-read from disk (other processes write too) once
+# every this many writes, and tracked in-process in between
+_RECOUNT_EVERY = 100
+
+# Response headers kept with a cached body
+_KEPT_HEADERS = ('Content-Type', 'ETag', 'Cache-Control')
+
+
+def parse_cache_control(value):
+    """
+    Parses a Cache-Control header.
+
+    Returns:
+        Dictionary of lower-case directive to value (None for flags)
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+class HttpCache:
+    """
+    On-disk cache of Spotify catalog GET responses, in one SQLite file.
+
+    Bodies are stored zlib-compressed with their ETag and freshness
+    lifetime from Cache-Control. The least recently used entries are
+    evicted once the stored bodies exceed max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._bytes = None
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' url TEXT PRIMARY KEY,'
+                ' etag TEXT,'
+                ' fresh_until REAL NOT NULL,'
+                ' used REAL NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' headers TEXT NOT NULL,'
+                ' body BLOB NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        """
+        Looks up a stored response.
+
+        Returns:
+            Tuple of (etag, fresh_until, headers, body), or None
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT etag, fresh_until, headers, body FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row:
+                conn.execute('UPDATE responses SET used = ? WHERE url = ?', (time.time(), url))
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+        etag, fresh_until, headers, body = row
+        return etag, fresh_until, json.loads(headers), zlib.decompress(body)
+
+    def put(self, url, etag, fresh_until, headers, body):
+        """Stores a response body, compressed."""
+        compressed = zlib.compress(body, 6)
+        try:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, fresh_until, used, size, headers, body)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, fresh_until, time.time(), len(compressed), json.dumps(headers), compressed)
+            )
+            self._writes += 1
+            if self._bytes is None or self._writes % _RECOUNT_EVERY == 0:
+                self._bytes = self.size()
+            else:
+                self._bytes += len(compressed)
+            if self._bytes > self.max_bytes:
+                self.evict()
+                self._bytes = self.size()
+        except sqlite3.Error:
+            pass
+
+    def refresh(self, url, fresh_until):
+        """Extends a stored response's freshness after a 304."""
+        try:
+            self._connect().execute(
+                'UPDATE responses SET fresh_until = ?, used = ? WHERE url = ?', (fresh_until, time.time(), url)
+            )
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits max_bytes."""
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Free a little extra so the next writes don't evict again at once
+        excess = total - int(self.max_bytes * 0.9)
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            freed = 0
+            for url, size in conn.execute('SELECT url, size FROM responses ORDER BY used').fetchall():
+                if freed >= excess:
+                    break
+                conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                freed += size
+
+    def size(self):
+        """Returns the total stored (compressed) bytes."""
+        return self._connect().execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+
+class CachingAdapter(BaseAdapter):
+    """
+    Transport adapter that serves Spotify catalog GETs from an HttpCache.
+
+    Fresh entries are returned without a request. Stale entries with an
+    ETag are revalidated with If-None-Match, and a 304 is answered from the
+    stored body. Everything else goes through the wrapped adapter (which
+    keeps spotipy's retry settings).
+    """
+
+    def __init__(self, inner, cache):
+        super().__init__()
+        self.inner = inner
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        url = request.url
+        if request.method != 'GET' or not url.startswith(CACHEABLE_PREFIXES) or 'from_token' in url:
+            return self.inner.send(request, **kwargs)
+
+        entry = self.cache.get(url)
+        if entry:
+            etag, fresh_until, headers, body = entry
+            if fresh_until > time.time():
+                CACHE_REQUESTS.inc(cache='http', result='hit')
+                return self._response(request, headers, body)
+            if etag:
+                request.headers['If-None-Match'] = etag
+
+        response = self.inner.send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            CACHE_REQUESTS.inc(cache='http', result='revalidated')
+            fresh_until = self._fresh_until(response.headers)
+            self.cache.refresh(url, fresh_until)
+            return self._response(request, entry[2], entry[3])
+
+        CACHE_REQUESTS.inc(cache='http', result='miss')
+        if response.status_code == 200:
+            self._store(url, response)
+        return response
+
+    def _fresh_until(self, headers):
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in directives:
+            return 0
+        try:
+            return time.time() + int(directives.get('max-age') or 0)
+        except ValueError:
+            return 0
+
+    def _store(self, url, response):
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return
+        etag = response.headers.get('ETag')
+        fresh_until = self._fresh_until(response.headers)
+        if not etag and fresh_until <= time.time():
+            # Neither reusable nor revalidatable
+            return
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        self.cache.put(url, etag, fresh_until, headers, response.content)
+
+    def _response(self, request, headers, body):
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_http_cache():
+    """
+    Returns the process-wide HTTP response cache configured from the
+    environment.
+
+    HTTP_CACHE_PATH sets the SQLite file (empty disables the cache) and
+    HTTP_CACHE_MAX_BYTES the size cap for compressed bodies.
+
+    Returns:
+        HttpCache object, or None if disabled or unavailable
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = os.getenv('HTTP_CACHE_PATH', DEFAULT_PATH)
+                if not path:
+                    _default = False
+                else:
+                    try:
+                        _default = HttpCache(path, int(os.getenv('HTTP_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)))
+                    except (sqlite3.Error, ValueError) as e:
+                        print(f"✗ HTTP cache disabled: {e}")
+                        _default = False
+    return _default or None
+
+
+def install_http_cache(sp):
+    """
+    Routes a spotipy client's HTTPS requests through the HTTP cache.
+
+    Args:
+        sp: spotipy.Spotify object
+    """
+    cache = get_http_cache()
+    session = getattr(sp, '_session', None)
+    if not cache or not hasattr(session, 'get_adapter'):
+        return
+    inner = session.get_adapter('https://api.spotify.com/')
+    if not isinstance(inner, CachingAdapter):
+        session.mount('https://api.spotify.com/', CachingAdapter(inner, cache))
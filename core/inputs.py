@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+import sys
+from contextlib import nullcontext
+
+
+INPUT_FORMATS = ('text', 'csv', 'tsv', 'jsonl')
+
+# Column names recognised without a mapping, matched case-insensitively.
+# Covers the usual playlist exports (Spotify, Exportify, Apple Music, TuneMyMusic).
+DEFAULT_COLUMNS = {
+    'name': ('name', 'track', 'track name', 'title', 'song', 'song name'),
+    'artist': ('artist', 'artists', 'artist name', 'artist name(s)', 'artist names'),
+    'album': ('album', 'album name', 'album title'),
+    'isrc': ('isrc',),
+}
+
+# Separators between several artists in one column
+_ARTIST_SEPARATORS = (';', ',', ' & ', ' feat. ')
+
+
+def detect_format(file_path):
+    """
+    Guesses an input file's format from its extension.
+
+    Returns:
+        'csv', 'tsv', 'jsonl' or 'text'
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.tsv', '.tab'):
+        return 'tsv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'text'
+
+
+def parse_columns(spec):
+    """
+    Parses a column mapping such as "name=Track Name,artist=Artist Name(s),isrc=ISRC".
+
+    Args:
+        spec: Mapping string, or None
+
+    Returns:
+        Dictionary mapping field ('name', 'artist', 'album', 'isrc') to column
+
+    Raises:
+        ValueError: If the mapping names an unknown field
+    """
+    columns = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        field, _, column = part.partition('=')
+        field = field.strip().lower()
+        if field not in DEFAULT_COLUMNS or not column.strip():
+            raise ValueError(f"Bad column mapping '{part.strip()}' (fields: {', '.join(DEFAULT_COLUMNS)})")
+        columns[field] = column.strip()
+    return columns
+
+
+def _resolve_columns(header, columns):
+    """Maps each field to the actual header name, honouring explicit mappings."""
+    by_lower = {name.strip().lower(): name for name in header}
+    resolved = {}
+    for field, candidates in DEFAULT_COLUMNS.items():
+        if field in columns:
+            name = by_lower.get(columns[field].lower())
+            if name is None:
+                raise ValueError(f"Column '{columns[field]}' not found (have: {', '.join(header)})")
+            resolved[field] = name
+            continue
+        for candidate in candidates:
+            if candidate in by_lower:
+                resolved[field] = by_lower[candidate]
+                break
+    return resolved
+
+
+def _field(record, key):
+    """Gets a value from a flat or nested (dotted key) record."""
+    value = record
+    for part in key.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    if isinstance(value, list):
+        # e.g. Spotify's artists: [{"name": ...}, ...]
+        value = value[0] if value else None
+        if isinstance(value, dict):
+            value = value.get('name')
+    return str(value).strip() if value not in (None, '') else None
+
+
+class InputRecord(str):
+    """
+    An input line built from a mapped row. It reads like any other line
+    (for progress, plan entries and results), but keeps the row's own
+    name and artist fields, so they are searched as given instead of
+    being split out of the line again.
+    """
+
+    def __new__(cls, line, name, artist=None):
+        record = super().__new__(cls, line)
+        record.fields = (name, artist)
+        return record
+
+    def __reduce__(self):
+        # Keeps the fields when sent to core.shard's worker processes
+        return InputRecord, (str(self), *self.fields)
+
+
+def _first_artist(artists):
+    for separator in _ARTIST_SEPARATORS:
+        if separator in artists:
+            return artists.split(separator, 1)[0].strip()
+    return artists
+
+
+def record_to_line(record, plan_type, split_artists=False):
+    """
+    Turns one mapped record into the pipeline's input line.
+
+    Songs with an ISRC become "isrc:CODE", which resolves exactly; other
+    songs and albums become an InputRecord that reads "Name - Artist" but
+    carries the name and artist separately; artists are just the name.
+
+    Args:
+        record: Dictionary with any of 'name', 'artist', 'album', 'isrc'
+        plan_type: 'songs', 'artists', or 'albums'
+        split_artists: If True, keeps only the first of several artists
+            in the artist column (separated by ';', ',', ' & ' or ' feat. ')
+
+    Returns:
+        Input line, or None if the record lacks the needed fields
+    """
+    artist = record.get('artist')
+    if artist and split_artists:
+        artist = _first_artist(artist)
+
+    if plan_type == 'songs':
+        if record.get('isrc'):
+            return f"isrc:{record['isrc'].upper()}"
+        name = record.get('name')
+    elif plan_type == 'albums':
+        name = record.get('album') or record.get('name')
+    else:
+        return artist or record.get('name')
+
+    if not name:
+        return None
+    return InputRecord(f"{name} - {artist}" if artist else name, name, artist)
+
+
+def _open(file_path):
+    if file_path == '-':
+        return nullcontext(sys.stdin)
+    return open(file_path, 'r', encoding='utf-8-sig', newline='')
+
+
+def iter_input_lines(file_path, plan_type='songs', input_format=None, columns=None, split_artists=False):
+    """
+    Reads input lines from a text, CSV, TSV or JSONL file one row at a time,
+    so arbitrarily large exports never sit in memory.
+
+    Text files are read as-is, one line per entry. For tabular and JSONL
+    input each row is mapped to name, artist, album and ISRC fields, by
+    the given column mapping or by well-known column names, and turned
+    into a line with record_to_line(). JSONL keys may be dotted paths into
+    nested objects, e.g. "track.name". Rows without usable fields, and
+    JSONL lines that aren't a JSON object, are skipped.
+
+    Args:
+        file_path: Path to the file, or '-' for stdin
+        plan_type: 'songs', 'artists', or 'albums'
+        input_format: One of INPUT_FORMATS (default: from the file extension)
+        columns: Dictionary from parse_columns(), or None
+        split_artists: If True, keeps only the first artist of an artist
+            column listing several (see record_to_line())
+
+    Yields:
+        Input lines
+
+    Raises:
+        ValueError: If a mapped column doesn't exist
+    """
+    input_format = input_format or ('text' if file_path == '-' else detect_format(file_path))
+    columns = columns or {}
+
+    with _open(file_path) as f:
+        if input_format == 'text':
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+            return
+
+        if input_format == 'jsonl':
+            keys = None
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    # Like a row without usable fields: skip it, keep streaming
+                    print(f"✗ Skipping line {number} of {file_path}: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    print(f"✗ Skipping line {number} of {file_path}: not a JSON object")
+                    continue
+                if keys is None:
+                    header = list(record.keys())
+                    keys = _resolve_columns(header, {k: v for k, v in columns.items() if '.' not in v})
+                    keys.update({k: v for k, v in columns.items() if '.' in v})
+                line = record_to_line({field: _field(record, key) for field, key in keys.items()}, plan_type, split_artists)
+                if line:
+                    yield line
+            return
+
+        reader = csv.DictReader(f, delimiter='\t' if input_format == 'tsv' else ',')
+        keys = _resolve_columns(reader.fieldnames or [], columns)
+        for row in reader:
+            record = {field: (row.get(name) or '').strip() or None for field, name in keys.items()}
+            line = record_to_line(record, plan_type, split_artists)
+            if line:
+                yield line
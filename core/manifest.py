@@ -0,0 +1,192 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .plan import PLAN_TYPES, resolve_line
+from .playlist import add_tracks_in_batches, create_playlist, list_user_playlists
+from .search import prefetch_tracks
+from .sync import sync_playlist
+
+
+EXISTING_MODES = ('create', 'append', 'sync')
+
+
+def _read_lines(value, base_dir):
+    """Returns a source's lines: an inline list, or a file path relative to the manifest."""
+    if isinstance(value, list):
+        return [str(line).strip() for line in value if str(line).strip()]
+    path = os.path.join(base_dir, value)
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_manifest(file_path):
+    """
+    Reads a playlist manifest.
+
+    The manifest is JSON with an optional "defaults" object and a
+    "playlists" list. Each playlist has a "name", optional "description",
+    "public", "mode" and "top_n" (artist mode), and any of "songs",
+    "artists" and "albums", each either a list of lines or the path of a
+    text file (relative to the manifest):
+
+        {
+          "defaults": {"public": false, "mode": "top10"},
+          "playlists": [
+            {"name": "Beatles Essentials", "artists": ["The Beatles"], "mode": "topn", "top_n": 25},
+            {"name": "Road Trip", "songs": "sample_songs.txt", "albums": ["Abbey Road - The Beatles"]}
+          ]
+        }
+
+    Args:
+        file_path: Path to the manifest
+
+    Returns:
+        List of playlist specs with 'name', 'description', 'public' and
+        'sources' (list of (type, line, mode, top_n) resolution keys)
+
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    defaults = manifest.get('defaults', {})
+    specs = []
+
+    for i, entry in enumerate(manifest.get('playlists', []), 1):
+        settings = {**defaults, **entry}
+        name = settings.get('name')
+        if not name:
+            raise ValueError(f"Playlist {i} in the manifest has no name")
+
+        mode = settings.get('mode', 'top10')
+        top_n = settings.get('top_n')
+        if mode == 'topn' and not top_n:
+            raise ValueError(f"Playlist '{name}' uses mode topn without top_n")
+
+        sources = []
+        for source_type in PLAN_TYPES:
+            if source_type not in entry:
+                continue
+            for line in _read_lines(entry[source_type], base_dir):
+                if source_type == 'artists':
+                    sources.append((source_type, line, mode, top_n))
+                else:
+                    sources.append((source_type, line, None, None))
+
+        specs.append({
+            'name': name,
+            'description': settings.get('description', ''),
+            'public': settings.get('public', True),
+            'sources': sources
+        })
+
+    if not specs:
+        raise ValueError("The manifest defines no playlists")
+    return specs
+
+
+def resolve_sources(sp, specs, concurrency=4):
+    """
+    Resolves every distinct source line across all playlists exactly once.
+
+    Args:
+        sp: Spotify client object
+        specs: Playlist specs from load_manifest()
+        concurrency: Number of lines resolved at once
+
+    Returns:
+        Dictionary mapping each (type, line, mode, top_n) key to its plan entry
+    """
+    keys = list(dict.fromkeys(source for spec in specs for source in spec['sources']))
+
+    print(f"\n=== Resolving {len(keys)} distinct sources for {len(specs)} playlists ===\n")
+
+    # Track URIs among the songs are fetched in bulk up front
+    prefetched = {}
+    for _ in prefetch_tracks(sp, [key[1] for key in keys if key[0] == 'songs'], prefetched):
+        pass
+
+    def resolve(key):
+        source_type, line, mode, top_n = key
+        try:
+            entry = resolve_line(sp, line, source_type, mode or 'top10', top_n, prefetched)
+        except Exception as e:
+            print(f"✗ Error resolving {line}: {e}")
+            return key, {'input': line, 'uris': [], 'match': None, 'error': str(e)}
+        if entry['uris']:
+            print(f"✓ {line} → {entry['match']} ({len(entry['uris'])} tracks)")
+        else:
+            print(f"✗ Not found: {line}")
+        return key, entry
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return dict(pool.map(resolve, keys))
+
+
+def build_from_manifest(sp, specs, concurrency=4, existing='create'):
+    """
+    Creates and fills every playlist in a manifest.
+
+    Catalog lookups are shared: a source used by several playlists is
+    resolved once. Playlists are then created and filled concurrently
+    with 100-track batch writes.
+
+    Args:
+        sp: Spotify client object
+        specs: Playlist specs from load_manifest()
+        concurrency: Number of lookups and playlists processed at once
+        existing: What to do when a playlist with the same name exists:
+            'create' a new one anyway, 'append' to it, or 'sync' it to
+            exactly the manifest's tracks
+
+    Returns:
+        List of result dicts per playlist with 'name', 'playlist_id',
+        'tracks', 'missing' (source lines that resolved to nothing) and,
+        if creating or filling the playlist failed, 'error'
+    """
+    resolved = resolve_sources(sp, specs, concurrency)
+
+    existing_ids = {}
+    if existing != 'create':
+        for playlist in list_user_playlists(sp):
+            existing_ids.setdefault(playlist['name'].lower(), playlist['id'])
+
+    def fill(spec):
+        track_uris = []
+        seen = set()
+        missing = []
+        for key in spec['sources']:
+            entry = resolved[key]
+            if not entry['uris']:
+                missing.append(key[1])
+            for uri in entry['uris']:
+                if uri not in seen:
+                    seen.add(uri)
+                    track_uris.append(uri)
+
+        playlist_id = existing_ids.get(spec['name'].lower())
+        result = {'name': spec['name'], 'playlist_id': playlist_id, 'tracks': len(track_uris), 'missing': missing}
+        try:
+            if playlist_id and existing == 'sync':
+                print(f"\nSyncing {spec['name']} to {len(track_uris)} tracks...")
+                sync_playlist(sp, playlist_id, track_uris)
+            else:
+                if not playlist_id:
+                    playlist_id = result['playlist_id'] = create_playlist(
+                        sp, spec['name'], spec['description'], spec['public']
+                    )
+                print(f"\nAdding {len(track_uris)} tracks to {spec['name']}...")
+                added = add_tracks_in_batches(sp, playlist_id, track_uris)
+                if added < len(track_uris):
+                    result['error'] = f"only {added}/{len(track_uris)} tracks added"
+        except Exception as e:
+            # One playlist failing doesn't lose the others' results
+            print(f"✗ Error filling {spec['name']}: {e}")
+            result['error'] = str(e)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return list(pool.map(fill, specs))
@@ -0,0 +1,432 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+
+# Latency buckets in seconds, tuned for Spotify API round trips
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_lock = threading.Lock()
+_local = threading.local()
+
+# Directory shared by worker processes (see share_across_processes())
+_shared_dir = None
+_writer_pid = None
+# Seconds between writes of this process's values to the shared directory
+_SHARE_INTERVAL = 1.0
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing value, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def state(self):
+        with _lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merged(self, states):
+        """Sums the values of several processes' state()."""
+        values = {}
+        for state in states:
+            for key, value in state:
+                key = tuple(key)
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def samples(self, values=None):
+        if values is None:
+            with _lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge:
+    """A value that can go up and down, optionally split by labels."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with _lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def state(self):
+        with _lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merged(self, states):
+        """Takes the highest value of several live processes' state()."""
+        values = {}
+        for state in states:
+            for key, value in state:
+                key = tuple(key)
+                values[key] = max(values.get(key, value), value)
+        return values
+
+    def samples(self, values=None):
+        if values is None:
+            with _lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, optionally split by labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with _lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def state(self):
+        with _lock:
+            return [[list(key), [list(counts), total]] for key, (counts, total) in self._values.items()]
+
+    def merged(self, states):
+        """Sums the buckets of several processes' state()."""
+        values = {}
+        for state in states:
+            for key, (counts, total) in state:
+                key = tuple(key)
+                own_counts, own_total = values.get(key, ([0] * len(self.buckets), 0.0))
+                values[key] = ([a + b for a, b in zip(own_counts, counts)], own_total + total)
+        return values
+
+    def samples(self, values=None):
+        if values is None:
+            with _lock:
+                values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                yield f'{self.name}_bucket', labels, count
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, counts[-1]
+
+
+def counter(name, documentation, labelnames=()):
+    """Creates and registers a Counter."""
+    metric = Counter(name, documentation, labelnames)
+    _registry.append(metric)
+    return metric
+
+
+def gauge(name, documentation, labelnames=()):
+    """Creates and registers a Gauge."""
+    metric = Gauge(name, documentation, labelnames)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Creates and registers a Histogram."""
+    metric = Histogram(name, documentation, labelnames, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def render():
+    """
+    Renders every registered metric in Prometheus text exposition format.
+
+    With share_across_processes(), the values are those of every process
+    sharing the directory: counters and histograms summed (including
+    processes that have exited, so totals never go backwards), gauges the
+    highest value among live processes.
+
+    Returns:
+        String suitable for a /metrics response body
+    """
+    states = None
+    if _shared_dir:
+        write_shared()
+        states = _read_shared()
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        values = None
+        if states is not None:
+            keep_exited = metric.kind != 'gauge'
+            values = metric.merged(
+                state[metric.name] for pid, state in states
+                if metric.name in state and (keep_exited or _alive(pid))
+            )
+        for name, labels, value in metric.samples(values):
+            lines.append(f'{name}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def share_across_processes(directory):
+    """
+    Shares metrics between processes serving one endpoint, e.g. gunicorn
+    workers behind one port, through files in a common directory.
+
+    Every process writes its values to <directory>/<pid>.json about once a
+    second, and render() in any of them reports the combined values. Empty
+    the directory when the server restarts, or old totals are kept.
+
+    Args:
+        directory: Directory path, or None to keep metrics per process
+    """
+    global _shared_dir
+    _shared_dir = directory or None
+    if _shared_dir:
+        os.makedirs(_shared_dir, exist_ok=True)
+        start_sharing()
+
+
+def start_sharing():
+    """
+    Starts this process's background writer for share_across_processes(),
+    if it isn't running yet. Cheap to call on every request, so a worker
+    forked after setup (gunicorn --preload) starts its own.
+    """
+    global _writer_pid
+    if not _shared_dir or _writer_pid == os.getpid():
+        return
+    with _lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer_pid = os.getpid()
+
+    def write_periodically():
+        while True:
+            time.sleep(_SHARE_INTERVAL)
+            write_shared()
+
+    threading.Thread(target=write_periodically, name='metrics-writer', daemon=True).start()
+    atexit.register(write_shared)
+
+
+def write_shared():
+    """Writes this process's values to the shared directory."""
+    if not _shared_dir:
+        return
+    state = {metric.name: metric.state() for metric in _registry}
+    path = os.path.join(_shared_dir, f'{os.getpid()}.json')
+    temp = f'{path}.{threading.get_ident()}.tmp'
+    try:
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        # Readers see the old file or the new one, never half of one
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+def _read_shared():
+    """Returns (pid, state) for every process's file in the shared directory."""
+    states = []
+    try:
+        names = os.listdir(_shared_dir)
+    except OSError:
+        return states
+    for name in names:
+        pid, extension = os.path.splitext(name)
+        if extension != '.json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(_shared_dir, name), encoding='utf-8') as f:
+                states.append((int(pid), json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return states
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class _CallCount:
+    """Spotify calls made for one unit of work, possibly from several threads."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.value += 1
+
+
+def reset_call_count():
+    """Starts counting Spotify calls made by the current thread."""
+    _local.count = _CallCount()
+
+
+def note_call():
+    """Counts one Spotify call against the current thread's count."""
+    current_call_count().add()
+
+
+def current_call_count():
+    """Returns the _CallCount the current thread's Spotify calls go to."""
+    count = getattr(_local, 'count', None)
+    if count is None:
+        count = _local.count = _CallCount()
+    return count
+
+
+def call_count():
+    """Returns the Spotify calls counted for this thread since reset_call_count()."""
+    count = getattr(_local, 'count', None)
+    return count.value if count else 0
+
+
+def counting_for_caller(func):
+    """
+    Wraps func so calls it makes on another thread (e.g. in a thread pool)
+    count towards the calling thread's count, as if made there.
+
+    Returns:
+        Wrapped function
+    """
+    count = getattr(_local, 'count', None)
+    if count is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        previous = getattr(_local, 'count', None)
+        _local.count = count
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.count = previous
+
+    return wrapper
+
+
+# Metrics shared by core/ and web/
+SPOTIFY_CALLS = counter(
+    'spotify_calls_total',
+    'Spotify API calls made through the client, by method and outcome.',
+    ('method', 'status'),
+)
+SPOTIFY_LATENCY = histogram(
+    'spotify_call_duration_seconds',
+    'Latency of Spotify API calls, by method.',
+    ('method',),
+)
+SPOTIFY_RATE_LIMITED = counter(
+    'spotify_rate_limited_total',
+    'Spotify API calls rejected with HTTP 429, by method.',
+    ('method',),
+)
+RATE_LIMIT_WAIT = counter(
+    'rate_limit_wait_seconds_total',
+    'Seconds spent sleeping to pace Spotify API calls.',
+)
+CACHE_REQUESTS = counter(
+    'cache_requests_total',
+    'Lookups against caches in front of the Spotify API, by cache and result (hit/miss).',
+    ('cache', 'result'),
+)
+HEDGED_CALLS = counter(
+    'spotify_hedged_calls_total',
+    'Duplicate Spotify reads sent after the latency threshold, by method and result (won/lost).',
+    ('method', 'result'),
+)
+CIRCUIT_STATE = gauge(
+    'spotify_circuit_state',
+    'State of the Spotify circuit breaker: 0 closed, 1 half-open, 2 open.',
+)
+CIRCUIT_TRANSITIONS = counter(
+    'spotify_circuit_transitions_total',
+    'Spotify circuit breaker state changes, by new state.',
+    ('state',),
+)
+CIRCUIT_REJECTED = counter(
+    'spotify_circuit_rejected_total',
+    'Spotify calls failed fast while the circuit was open.',
+)
+PLAYLIST_ADD_ITEMS = histogram(
+    'spotify_playlist_add_items',
+    'Tracks per playlist_add_items call, after merging concurrent adds.',
+    buckets=(1, 2, 5, 10, 25, 50, 75, 100),
+)
+HTTP_LATENCY = histogram(
+    'http_request_duration_seconds',
+    'Latency of web requests, by route, method and status code.',
+    ('route', 'method', 'status'),
+)
+HTTP_SPOTIFY_CALLS = histogram(
+    'http_request_spotify_calls',
+    'Spotify API calls made while serving one web request, by route.',
+    ('route',),
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
@@ -0,0 +1,17 @@
+import time
+
+from .metrics import RATE_LIMIT_WAIT
+from .tracing import span
+
+
+def pace(seconds):
+    """
+    Sleeps between Spotify calls to avoid rate limiting.
+    The time spent is recorded in the rate-limit wait metric.
+
+    Args:
+        seconds: Number of seconds to wait
+    """
+    with span('sleep'):
+        time.sleep(seconds)
+    RATE_LIMIT_WAIT.inc(seconds)
@@ -0,0 +1,83 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import counting_for_caller
+from .pacing import pace
+from .ratelimit import get_rate_limiter
+
+
+# Pages fetched at once after the first one. Calls still wait for the
+# process-wide rate limiter (see core.ratelimit), so this only bounds how
+# many requests are in flight.
+DEFAULT_CONCURRENCY = 8
+
+
+def iter_pages(fetch_page, page_size, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fetches the pages of an offset-paginated Spotify listing.
+
+    The first page reports the listing's 'total', so the offsets of all
+    remaining pages are known up front and fetched concurrently instead of
+    following 'next' links one round trip at a time. At most `concurrency`
+    pages are held ahead of the consumer. Without a process-wide rate
+    limiter (see core.ratelimit) the pages are fetched one by one, 0.5s
+    apart, instead.
+
+    Args:
+        fetch_page: Function (offset, limit) -> Spotify paging object
+        page_size: Items per page (the endpoint's maximum limit)
+        concurrency: Pages fetched at once
+
+    Yields:
+        Paging objects, in listing order
+    """
+    first = fetch_page(0, page_size)
+    yield first
+    total = first.get('total')
+
+    if total is None:
+        # Not a known-size listing: fall back to the offsets page by page
+        offset = len(first['items'])
+        page = first
+        while page.get('next') and page['items']:
+            page = fetch_page(offset, page_size)
+            yield page
+            offset += len(page['items'])
+        return
+
+    offsets = range(len(first['items']), total, page_size)
+    if not offsets:
+        return
+
+    if get_rate_limiter() is None:
+        # Nothing would pace concurrent pages: fetch them one at a time
+        # with the old pause between pages
+        for offset in offsets:
+            pace(0.5)
+            yield fetch_page(offset, page_size)
+        return
+
+    # Pages fetched on the pool count as the caller's calls (e.g. per web request)
+    fetch_page = counting_for_caller(fetch_page)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(offsets)))) as pool:
+        pending = deque()
+        for offset in offsets:
+            pending.append(pool.submit(fetch_page, offset, page_size))
+            if len(pending) >= concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def fetch_all_pages(fetch_page, page_size, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fetches every item of an offset-paginated Spotify listing (see
+    iter_pages()).
+
+    Returns:
+        List of items, in listing order
+    """
+    items = []
+    for page in iter_pages(fetch_page, page_size, concurrency):
+        items.extend(page['items'])
+    return items
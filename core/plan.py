@@ -0,0 +1,231 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .album import get_album_tracks, parse_album_input, search_album
+from .artist import get_artist_track_uris, search_artist
+from .pacing import pace
+from .playlist import add_tracks_in_batches
+from .search import find_track, parse_song_input, parse_track_id, prefetch_tracks
+from .tracing import span
+
+
+PLAN_VERSION = 1
+PLAN_TYPES = ('songs', 'artists', 'albums')
+
+
+def input_fields(line, parse):
+    """
+    Gets (name, artist) from an input line: the mapped fields of an
+    InputRecord (see core.inputs), otherwise by parsing the line.
+    """
+    fields = getattr(line, 'fields', None)
+    return fields if fields else parse(line)
+
+
+def resolve_line(sp, line, plan_type, mode='top10', custom_n=None, prefetched=None):
+    """
+    Resolves one input line to track URIs without writing anything.
+
+    Args:
+        sp: Spotify client object
+        line: Input line ("Song - Artist", a track URI/URL or ISRC,
+            artist name or "Album - Artist")
+        plan_type: 'songs', 'artists', or 'albums'
+        mode: Artist mode ('top10', 'topn', or 'all')
+        custom_n: Number of songs per artist if mode is 'topn'
+        prefetched: Dictionary of track ID to track object already fetched
+            in bulk (see prefetch_tracks())
+
+    Returns:
+        Plan entry dict with 'input', 'uris' and 'match' (None if not found)
+    """
+    entry = {'input': line, 'uris': [], 'match': None}
+
+    if plan_type == 'songs':
+        track_id = parse_track_id(line)
+        if prefetched and track_id in prefetched:
+            track = prefetched[track_id]
+        else:
+            song_name, artist_name = input_fields(line, parse_song_input)
+            track = find_track(sp, song_name, artist_name)
+        if track:
+            entry['uris'] = [track['uri']]
+            entry['match'] = f"{track['name']} by {', '.join([a['name'] for a in track['artists']])}"
+
+    elif plan_type == 'artists':
+        artist = search_artist(sp, line, auto_select=True)
+        if artist:
+            entry['uris'] = get_artist_track_uris(sp, artist['id'], mode, custom_n) or []
+            entry['match'] = artist['name']
+            entry['id'] = artist['id']
+
+    elif plan_type == 'albums':
+        album_name, artist_name = input_fields(line, parse_album_input)
+        album = search_album(sp, album_name, artist_name, auto_select=True)
+        if album:
+            entry['uris'] = get_album_tracks(sp, album['id'])
+            entry['match'] = f"{album['name']} by {', '.join([a['name'] for a in album['artists']])}"
+            entry['id'] = album['id']
+
+    else:
+        raise ValueError(f"Unknown plan type: {plan_type}")
+
+    return entry
+
+
+def build_plan(sp, lines, plan_type, mode='top10', custom_n=None, source=None, delay=3, concurrency=1):
+    """
+    Resolves every input line into a plan.
+
+    Args:
+        sp: Spotify client object
+        lines: List of input lines, or any iterable (e.g. from
+            core.inputs.iter_input_lines), which is consumed as it goes
+        plan_type: 'songs', 'artists', or 'albums'
+        mode: Artist mode ('top10', 'topn', or 'all')
+        custom_n: Number of songs per artist if mode is 'topn'
+        source: Name of the input file, recorded in the plan
+        delay: Seconds to wait between lines (sequential runs only)
+        concurrency: Number of lines resolved at once. Above 1 there is no
+            delay between lines; pacing comes from core.ratelimit instead.
+
+    Returns:
+        Plan dictionary with entries in input order
+    """
+    sized = isinstance(lines, (list, tuple))
+    total = f"/{len(lines)}" if sized else ""
+    print(f"\n=== Resolving {f'{len(lines)} ' if sized else ''}{plan_type} ===\n")
+
+    prefetched = {}
+    if plan_type == 'songs':
+        lines_iter = prefetch_tracks(sp, lines, prefetched)
+    else:
+        lines_iter = lines
+
+    def resolve(numbered):
+        i, line = numbered
+        print(f"[{i}{total}] Resolving: {line}")
+        try:
+            with span(line, 'line'):
+                entry = resolve_line(sp, line, plan_type, mode, custom_n, prefetched)
+        except Exception as e:
+            print(f"✗ Error resolving {line}: {e}")
+            return {'input': line, 'uris': [], 'match': None, 'error': str(e)}
+
+        if entry['uris']:
+            print(f"✓ {entry['match']} ({len(entry['uris'])} tracks)")
+        else:
+            print(f"✗ Not found: {line}")
+        return entry
+
+    entries = []
+    if concurrency > 1:
+        # Keep a bounded window of lines in flight, so a streamed input is
+        # only read as fast as it is resolved
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = deque()
+            for numbered in enumerate(lines_iter, 1):
+                pending.append(pool.submit(resolve, numbered))
+                if len(pending) >= concurrency * 2:
+                    entries.append(pending.popleft().result())
+            entries.extend(future.result() for future in pending)
+    else:
+        for i, line in enumerate(lines_iter, 1):
+            if i > 1 and parse_track_id(line) not in prefetched:
+                pace(delay)
+            entries.append(resolve((i, line)))
+
+    return {
+        'version': PLAN_VERSION,
+        'type': plan_type,
+        'mode': mode if plan_type == 'artists' else None,
+        'source': source,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'entries': entries
+    }
+
+
+def plan_uris(plan, dedupe=True):
+    """
+    Gets every track URI in a plan, in input order.
+
+    Args:
+        plan: Plan dictionary
+        dedupe: If True, keeps only the first occurrence of each URI
+
+    Returns:
+        List of track URIs
+    """
+    uris = []
+    seen = set()
+    for entry in plan['entries']:
+        for uri in entry['uris']:
+            if dedupe and uri in seen:
+                continue
+            seen.add(uri)
+            uris.append(uri)
+    return uris
+
+
+def write_plan(plan, file_path):
+    """
+    Writes a plan as JSON with one entry per line, so it stays compact
+    and easy to review or diff.
+
+    Args:
+        plan: Plan dictionary
+        file_path: Output file path
+    """
+    header = {key: value for key, value in plan.items() if key != 'entries'}
+    with span('write plan'), open(file_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "entries": [\n')
+        for i, entry in enumerate(plan['entries']):
+            f.write(json.dumps(entry, ensure_ascii=False))
+            f.write(',\n' if i < len(plan['entries']) - 1 else '\n')
+        f.write(']}\n')
+
+
+def read_plan(file_path):
+    """
+    Reads a plan file written by write_plan().
+
+    Args:
+        file_path: Path to the plan file
+
+    Returns:
+        Plan dictionary
+
+    Raises:
+        ValueError: If the file is not a supported plan
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION or 'entries' not in plan:
+        raise ValueError(f"Not a version {PLAN_VERSION} plan file: {file_path}")
+    return plan
+
+
+def apply_plan(sp, plan, playlist_ids, dedupe=True):
+    """
+    Writes a plan to one or more playlists using 100-track batches only.
+    No searches are made.
+
+    Args:
+        sp: Spotify client object
+        plan: Plan dictionary
+        playlist_ids: List of playlist IDs
+        dedupe: If True, adds each track only once per playlist
+
+    Returns:
+        Dictionary mapping playlist ID to number of tracks added
+    """
+    track_uris = plan_uris(plan, dedupe=dedupe)
+    results = {}
+
+    for playlist_id in playlist_ids:
+        print(f"\nAdding {len(track_uris)} tracks to playlist {playlist_id}...")
+        results[playlist_id] = add_tracks_in_batches(sp, playlist_id, track_uris)
+
+    return results
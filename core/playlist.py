@@ -1,26 +1,27 @@
 from .auth import connect_spotify
+from .coalesce import add_items
+from .pacing import pace
+from .paginate import fetch_all_pages
+from .tracing import span
 
 
 def list_user_playlists(sp):
     """
     Lists all playlists for the current user.
-    Returns a list of playlist dictionaries with 'name' and 'id'.
+    Returns a list of playlist dictionaries with 'name', 'id' and
+    'snapshot_id'. Pages after the first are fetched concurrently.
     """
+    items = fetch_all_pages(
+        lambda offset, limit: sp.current_user_playlists(limit=limit, offset=offset), 50
+    )
+    
     playlists = []
-    results = sp.current_user_playlists()
-    
-    while results:
-        for playlist in results['items']:
-            playlists.append({
-                'name': playlist['name'],
-                'id': playlist['id']
-            })
-        
-        # Check if there are more playlists
-        if results['next']:
-            results = sp.next(results)
-        else:
-            break
+    for playlist in items:
+        playlists.append({
+            'name': playlist['name'],
+            'id': playlist['id'],
+            'snapshot_id': playlist.get('snapshot_id')
+        })
     
     return playlists
 
@@ -49,6 +50,72 @@ def create_playlist(sp, name, description="", public=True):
     return playlist['id']
 
 
+def add_tracks_in_batches(sp, playlist_id, track_uris, delay=2, position=None):
+    """
+    Adds tracks to a playlist in batches of 100 (Spotify limit).
+    Appends share calls with concurrent adds to the same playlist (see
+    core.coalesce); inserts at a position are sent as they are.
+    
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        track_uris: List of track URIs, added in order
+        delay: Seconds to wait between batches
+        position: Index to insert the tracks at (default: append); an
+            insert stops at the first failed batch
+    
+    Returns:
+        Number of tracks added
+    """
+    added = 0
+    for i in range(0, len(track_uris), 100):
+        batch = track_uris[i:i+100]
+        if position is None:
+            with span('write'):
+                result = add_items(sp, playlist_id, batch)
+            for error in result['errors']:
+                print(f"✗ Error adding batch: {error}")
+            added += result['added']
+            if result['added']:
+                print(f"✓ Added {result['added']} songs ({added}/{len(track_uris)})")
+        else:
+            try:
+                with span('write'):
+                    sp.playlist_add_items(playlist_id, batch, position=position + added)
+                added += len(batch)
+                print(f"✓ Added {len(batch)} songs ({added}/{len(track_uris)})")
+            except Exception as e:
+                print(f"✗ Error adding batch: {e}")
+                # Later batches would land at the wrong positions
+                break
+        
+        if i + 100 < len(track_uris):
+            pace(delay)  # Delay between batches
+    
+    return added
+
+
+def find_playlist(sp, name_or_id):
+    """
+    Finds one of the current user's playlists by ID or exact name.
+    
+    Args:
+        sp: Spotify client object
+        name_or_id: Playlist ID, or playlist name (case-insensitive)
+    
+    Returns:
+        Playlist ID if found, None otherwise
+    """
+    playlists = list_user_playlists(sp)
+    for playlist in playlists:
+        if playlist['id'] == name_or_id:
+            return playlist['id']
+    for playlist in playlists:
+        if playlist['name'].lower() == name_or_id.lower():
+            return playlist['id']
+    return None
+
+
 def get_or_create_playlist(sp):
     """
     Interactive function to let user select an existing playlist or create a new one.
@@ -97,6 +164,10 @@ def get_or_create_playlist(sp):
 
 
 if __name__ == "__main__":
+    from core.tracing import profile_from_args
+    
+    profile_from_args("Select or create a Spotify playlist")
+    
     try:
         sp = connect_spotify()
         playlist_id = get_or_create_playlist(sp)
@@ -0,0 +1,202 @@
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .metrics import RATE_LIMIT_WAIT
+from .tracing import span
+
+
+# Traffic classes, most urgent first. Interactive calls (a user waiting on
+# the dashboard) are always served before bulk calls (file imports).
+PRIORITIES = ('interactive', 'bulk')
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making Spotify calls.
+
+    Allows `rate` calls per second on average, with bursts of up to
+    `burst` calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes one token, returning how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, priority='interactive', user=None):
+        """
+        Blocks until the caller may make one call. Calls are served in
+        arrival order; priority and user are accepted for compatibility
+        with PriorityRateLimiter and ignored.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            with span('sleep'):
+                time.sleep(wait)
+            RATE_LIMIT_WAIT.inc(wait)
+
+
+class PriorityRateLimiter(RateLimiter):
+    """
+    Token bucket that hands out calls by priority, then fairly per user.
+
+    Waiting callers queue per priority class and per user. Whenever a token
+    is free it goes to the most urgent class with callers waiting; within a
+    class, users take turns (round robin), so one user's large import can't
+    starve another user's import. Bulk calls only get the capacity that
+    interactive calls leave unused.
+    """
+
+    def __init__(self, rate, burst=None):
+        super().__init__(rate, burst)
+        self._ready = threading.Condition(self._lock)
+        # priority -> {user: deque of waiting tickets}, users in turn order
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _head(self):
+        """Returns the ticket to be served next, or None."""
+        for priority in PRIORITIES:
+            users = self._queues[priority]
+            if users:
+                return next(iter(users.values()))[0]
+        return None
+
+    def waiting(self):
+        """Returns the number of callers waiting per priority."""
+        with self._lock:
+            return {
+                priority: sum(len(tickets) for tickets in users.values())
+                for priority, users in self._queues.items()
+            }
+
+    def acquire(self, priority='interactive', user=None):
+        """
+        Blocks until the caller may make one call.
+
+        Args:
+            priority: 'interactive' or 'bulk'
+            user: Key of the user the call is made for (fair-share unit)
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority: {priority}")
+        ticket = object()
+        start = time.monotonic()
+        with self._ready:
+            users = self._queues[priority]
+            users.setdefault(user, deque()).append(ticket)
+            try:
+                self._refill()
+                if self._head() is not ticket or self._tokens < 1:
+                    with span('sleep'):
+                        while True:
+                            timeout = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                            self._ready.wait(timeout)
+                            self._refill()
+                            if self._head() is ticket and self._tokens >= 1:
+                                break
+                self._tokens -= 1
+            finally:
+                tickets = users[user]
+                tickets.remove(ticket)
+                if not tickets:
+                    del users[user]
+                else:
+                    # This user's next call goes behind the other users' calls
+                    users.move_to_end(user)
+                self._ready.notify_all()
+        wait = time.monotonic() - start
+        if wait > 0.001:
+            RATE_LIMIT_WAIT.inc(wait)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket kept in shared memory, so several worker processes draw
+    from one Spotify call budget.
+
+    Create it in the parent with a multiprocessing context and hand
+    shared_state() to each worker (e.g. through a Pool initializer), which
+    rebuilds it with SharedRateLimiter(rate, burst, state=...).
+    """
+
+    def __init__(self, rate, burst=None, state=None, context=None):
+        super().__init__(rate, burst)
+        if state is None:
+            context = context or multiprocessing.get_context()
+            state = (
+                context.Value('d', self.burst, lock=False),
+                context.Value('d', time.monotonic(), lock=False),
+                context.Lock()
+            )
+        self._shared = state
+
+    def shared_state(self):
+        """Returns the shared memory handles to pass to worker processes."""
+        return self._shared
+
+    def _reserve(self):
+        tokens, updated, lock = self._shared
+        with lock:
+            # CLOCK_MONOTONIC is system-wide, so timestamps compare across processes
+            now = time.monotonic()
+            tokens.value = min(self.burst, tokens.value + (now - updated.value) * self.rate)
+            updated.value = now
+            tokens.value -= 1
+            if tokens.value >= 0:
+                return 0.0
+            return -tokens.value / self.rate
+
+
+_limiter = None
+
+
+def configure_rate_limit(rate, burst=None):
+    """
+    Sets the process-wide Spotify call budget used by core.client.
+
+    Args:
+        rate: Calls per second, or None to remove the limit
+        burst: Maximum burst size (default: rate)
+
+    Returns:
+        The PriorityRateLimiter object, or None
+    """
+    global _limiter
+    _limiter = PriorityRateLimiter(rate, burst) if rate else None
+    return _limiter
+
+
+def use_rate_limiter(limiter):
+    """
+    Installs an existing limiter (e.g. a SharedRateLimiter) as the
+    process-wide Spotify call budget.
+    """
+    global _limiter
+    _limiter = limiter
+
+
+def get_rate_limiter():
+    """Returns the process-wide RateLimiter, or None if calls are unlimited."""
+    return _limiter
@@ -0,0 +1,211 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .artist import get_artist_track_uris, search_artist
+from .cache import get_lookup_cache
+from .metrics import CACHE_REQUESTS, counting_for_caller
+from .playlist import add_tracks_in_batches
+from .tracing import span
+
+
+# Related artists change slowly; keep crawled edges for a week
+RELATED_TTL = 7 * 24 * 60 * 60
+RELATED_PREFIX = 'related|'
+# In-memory edges are bounded: a long-lived web worker sees many crawls
+_MAX_EDGES = 5000
+
+DEFAULT_DEPTH = 1
+DEFAULT_FAN_OUT = 5
+DEFAULT_MAX_ARTISTS = 50
+
+
+class RelatedArtistGraph:
+    """
+    Related-artist edges crawled so far, kept in memory and in the shared
+    lookup cache (see core.cache), so later crawls from overlapping seeds
+    reuse them across runs and workers.
+
+    Each artist maps to its related artists as compact dicts with 'id',
+    'name' and 'popularity', most popular first. In-memory edges expire
+    with the cached ones and are dropped wholesale past a size bound.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+        self._edges = {}
+        self._lock = threading.Lock()
+
+    def neighbors(self, sp, artist_id):
+        """
+        Gets an artist's related artists, fetching them on first use.
+
+        Returns:
+            List of artist dicts (empty if Spotify wouldn't say)
+        """
+        with self._lock:
+            edge = self._edges.get(artist_id)
+            if edge and edge[1] > time.monotonic():
+                return edge[0]
+        key = f'{RELATED_PREFIX}{artist_id}'
+        neighbors = self._cache.get(key) if self._cache else None
+        if self._cache:
+            CACHE_REQUESTS.inc(cache='related', result='miss' if neighbors is None else 'hit')
+        if neighbors is None:
+            try:
+                results = sp.artist_related_artists(artist_id)
+            except Exception as e:
+                # Not cached: it may work next time
+                print(f"✗ Related artists unavailable for {artist_id}: {e}")
+                return []
+            neighbors = sorted(
+                (
+                    {'id': artist['id'], 'name': artist['name'], 'popularity': artist.get('popularity', 0)}
+                    for artist in results.get('artists') or []
+                ),
+                key=lambda artist: artist['popularity'],
+                reverse=True
+            )
+            if self._cache:
+                self._cache.set(key, neighbors, ttl=RELATED_TTL)
+        with self._lock:
+            if len(self._edges) >= _MAX_EDGES:
+                self._edges.clear()
+            self._edges[artist_id] = (neighbors, time.monotonic() + RELATED_TTL)
+        return neighbors
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_related_graph():
+    """Returns the process-wide RelatedArtistGraph."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = RelatedArtistGraph(get_lookup_cache())
+    return _graph
+
+
+def expand_artists(sp, seeds, depth=DEFAULT_DEPTH, fan_out=DEFAULT_FAN_OUT, max_artists=DEFAULT_MAX_ARTISTS,
+                   concurrency=8, graph=None):
+    """
+    Crawls related artists breadth-first from seed artists.
+
+    Each layer's related-artist lists are fetched concurrently. From each
+    artist, the `fan_out` most popular related artists not seen yet join
+    the next layer, until `depth` layers or `max_artists` artists.
+
+    Args:
+        sp: Spotify client object
+        seeds: List of artist objects (e.g. from search_artist())
+        depth: Layers of related artists to add (0: just the seeds)
+        fan_out: New artists taken from each artist's related list
+        max_artists: Most artists returned, seeds included
+        concurrency: Related-artist lists fetched at once
+        graph: RelatedArtistGraph (default: the process-wide one)
+
+    Returns:
+        List of artist dicts with 'id', 'name', 'popularity', 'depth' and
+        'via' (the artist it was reached from), seeds first, in BFS order
+    """
+    graph = graph or get_related_graph()
+    found = {}
+    for seed in seeds:
+        if seed['id'] not in found and len(found) < max_artists:
+            found[seed['id']] = {
+                'id': seed['id'], 'name': seed['name'], 'popularity': seed.get('popularity', 0),
+                'depth': 0, 'via': None
+            }
+    layer = list(found.values())
+
+    # Lookups on the pool count as the caller's calls (e.g. per web request)
+    neighbors_of = counting_for_caller(lambda artist: graph.neighbors(sp, artist['id']))
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for level in range(1, depth + 1):
+            if not layer or len(found) >= max_artists:
+                break
+            with span('fetch related'):
+                neighbor_lists = list(pool.map(neighbors_of, layer))
+            next_layer = []
+            for artist, neighbors in zip(layer, neighbor_lists):
+                taken = 0
+                for neighbor in neighbors:
+                    if taken >= fan_out or len(found) >= max_artists:
+                        break
+                    if neighbor['id'] in found:
+                        continue
+                    node = {**neighbor, 'depth': level, 'via': artist['name']}
+                    found[neighbor['id']] = node
+                    next_layer.append(node)
+                    taken += 1
+            print(f"  Layer {level}: {len(next_layer)} new artists")
+            layer = next_layer
+
+    return list(found.values())
+
+
+def add_related_artists_to_playlist(sp, playlist_id, seed_names, depth=DEFAULT_DEPTH, fan_out=DEFAULT_FAN_OUT,
+                                    max_artists=DEFAULT_MAX_ARTISTS, mode='top10', custom_n=None, auto_select=True):
+    """
+    Adds songs from seed artists and their related artists to a playlist.
+
+    Seeds are looked up with search_artist(), expanded with
+    expand_artists(), and every artist's tracks are picked with the usual
+    artist modes (top 10, top N or all). Tracks shared between artists
+    are added once.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        seed_names: List of artist names
+        depth: Layers of related artists to crawl
+        fan_out: New artists taken from each artist's related list
+        max_artists: Most artists used, seeds included
+        mode: 'top10', 'topn', or 'all'
+        custom_n: Number of songs per artist if mode is 'topn'
+        auto_select: If True, automatically selects the first match for
+            each seed
+
+    Returns:
+        Dictionary with 'artists' (from expand_artists()), 'missing'
+        (seed names not found), 'tracks_found' and 'tracks_added'
+    """
+    seeds = []
+    missing = []
+    for name in seed_names:
+        print(f"\nSearching for artist: {name}")
+        artist = search_artist(sp, name, auto_select=auto_select)
+        if artist:
+            seeds.append(artist)
+        else:
+            print(f"✗ Artist not found: {name}")
+            missing.append(name)
+
+    result = {'artists': [], 'missing': missing, 'tracks_found': 0, 'tracks_added': 0}
+    if not seeds:
+        return result
+
+    print(f"\nExpanding {len(seeds)} seed artists (depth {depth}, fan-out {fan_out}, max {max_artists})...")
+    artists = expand_artists(sp, seeds, depth, fan_out, max_artists)
+    result['artists'] = artists
+
+    track_uris = []
+    seen = set()
+    for artist in artists:
+        print(f"\nFetching songs from {artist['name']}" + (f" (via {artist['via']})" if artist['via'] else "") + "...")
+        for uri in get_artist_track_uris(sp, artist['id'], mode, custom_n) or []:
+            if uri not in seen:
+                seen.add(uri)
+                track_uris.append(uri)
+    result['tracks_found'] = len(track_uris)
+
+    if not track_uris:
+        print("✗ No tracks found")
+        return result
+
+    print(f"\nAdding {len(track_uris)} songs from {len(artists)} artists to playlist...")
+    result['tracks_added'] = add_tracks_in_batches(sp, playlist_id, track_uris)
+    return result
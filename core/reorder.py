@@ -0,0 +1,149 @@
+from .paginate import fetch_all_pages
+from .sync import plan_range_moves
+from .tracing import span
+
+
+# Sort keys: name -> (function of a playlist item, descending by default)
+REORDER_KEYS = {
+    'popularity': (lambda item: item['popularity'], True),
+    'release_date': (lambda item: item['release_date'], False),
+    'added_at': (lambda item: item['added_at'], False),
+    'name': (lambda item: item['name'].casefold(), False),
+    'artist': (lambda item: (item['artist'].casefold(), item['name'].casefold()), False),
+    'duration': (lambda item: item['duration_ms'], False),
+}
+
+_ITEM_FIELDS = (
+    'items(added_at,track(uri,name,popularity,duration_ms,artists(name),album(release_date))),'
+    'total,next'
+)
+
+
+def get_playlist_items(sp, playlist_id):
+    """
+    Reads a playlist's snapshot and the fields the sort keys use.
+
+    Returns:
+        Tuple of (snapshot_id, items), items in playlist order as dicts with
+        'uri' (None if unavailable), 'name', 'artist', 'popularity',
+        'release_date', 'added_at' and 'duration_ms'
+    """
+    with span('fetch playlist'):
+        snapshot_id = sp.playlist(playlist_id, fields='snapshot_id')['snapshot_id']
+        raw = fetch_all_pages(
+            lambda offset, limit: sp.playlist_items(playlist_id, fields=_ITEM_FIELDS, limit=limit, offset=offset),
+            100
+        )
+    items = []
+    for item in raw:
+        track = item.get('track') or {}
+        artists = track.get('artists') or []
+        items.append({
+            'uri': track.get('uri'),
+            'name': track.get('name') or '',
+            'artist': artists[0]['name'] if artists else '',
+            'popularity': track.get('popularity') or 0,
+            'release_date': (track.get('album') or {}).get('release_date') or '',
+            'added_at': item.get('added_at') or '',
+            'duration_ms': track.get('duration_ms') or 0,
+        })
+    return snapshot_id, items
+
+
+def target_order(items, by='popularity', reverse=False):
+    """
+    Ranks playlist items by a sort key. The sort is stable, so items that
+    tie keep their current relative order and need no move; unavailable
+    items go last.
+
+    Args:
+        items: Items from get_playlist_items()
+        by: One of REORDER_KEYS
+        reverse: If True, flips the key's default direction
+
+    Returns:
+        List of target indices, one per item in current order
+    """
+    if by not in REORDER_KEYS:
+        raise ValueError(f"Unknown sort key: {by} (choose from {', '.join(REORDER_KEYS)})")
+    key, descending = REORDER_KEYS[by]
+    descending = descending != reverse
+    available = [i for i, item in enumerate(items) if item['uri']]
+    ranked = sorted(available, key=lambda i: key(items[i]), reverse=descending)
+    # sorted() keeps ties in order even when reversed
+    ranked += [i for i, item in enumerate(items) if not item['uri']]
+    order = [0] * len(items)
+    for target, i in enumerate(ranked):
+        order[i] = target
+    return order
+
+
+def apply_moves(sp, playlist_id, moves, snapshot_id):
+    """
+    Applies range moves from plan_range_moves() one call at a time, each
+    against the snapshot the previous call produced.
+
+    The playlist's current snapshot is checked first: the moves are only
+    valid for the version they were computed from.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        moves: (range_start, insert_before, range_length) moves
+        snapshot_id: Snapshot the moves were computed against
+
+    Returns:
+        Number of moves applied
+
+    Raises:
+        RuntimeError: If the playlist changed since it was read
+    """
+    if not moves:
+        return 0
+    current = sp.playlist(playlist_id, fields='snapshot_id')['snapshot_id']
+    if current != snapshot_id:
+        raise RuntimeError("Playlist changed since it was read; run the reorder again")
+
+    applied = 0
+    with span('write'):
+        for range_start, insert_before, range_length in moves:
+            result = sp.playlist_reorder_items(
+                playlist_id, range_start, insert_before, range_length=range_length, snapshot_id=snapshot_id
+            )
+            snapshot_id = result['snapshot_id']
+            applied += 1
+            if applied % 25 == 0:
+                print(f"  {applied}/{len(moves)} moves applied")
+    return applied
+
+
+def reorder_playlist(sp, playlist_id, by='popularity', reverse=False, dry_run=False):
+    """
+    Sorts a playlist in place with as few reorder calls as possible.
+
+    Tracks already in order relative to each other (a longest increasing
+    subsequence of runs) stay put. Everything else moves in ranges of
+    tracks that are already adjacent in the target order, so no track is
+    deleted and re-added and added_at dates are kept.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        by: Sort key, one of REORDER_KEYS
+        reverse: If True, flips the key's default direction
+        dry_run: If True, only computes and reports the moves
+
+    Returns:
+        Dictionary with 'tracks', 'moves' (list of (range_start,
+        insert_before, range_length)), 'moved' (tracks moved) and 'calls'
+    """
+    snapshot_id, items = get_playlist_items(sp, playlist_id)
+    moves = plan_range_moves(target_order(items, by, reverse))
+    moved = sum(length for _, _, length in moves)
+
+    print(f"\nPlaylist has {len(items)} tracks")
+    print(f"  Sort by: {by}" + (" (reversed)" if reverse else ""))
+    print(f"  Moves:   {len(moves)} calls moving {moved} tracks")
+
+    calls = 0 if dry_run else apply_moves(sp, playlist_id, moves, snapshot_id)
+    return {'tracks': len(items), 'moves': moves, 'moved': moved, 'calls': calls}
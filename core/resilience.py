@@ -0,0 +1,422 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from .metrics import (
+    CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRANSITIONS, HEDGED_CALLS, RATE_LIMIT_WAIT, SPOTIFY_CALLS,
+    SPOTIFY_LATENCY, counting_for_caller, note_call
+)
+from .tracing import span
+
+
+CLOSED = 'closed'
+HALF_OPEN = 'half-open'
+OPEN = 'open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Longest a tripped circuit stays open between probes
+_MAX_RESET = 300
+
+# Returned by a hedge that wasn't sent because the primary call finished
+_SKIPPED = object()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Spotify while the circuit is open."""
+
+    def __init__(self, retry_in):
+        super().__init__(f"Spotify is unavailable, retrying in {math.ceil(retry_in)}s")
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(error):
+    """
+    Tells whether an exception means Spotify itself is unhealthy: a 5xx
+    response, or a connection error or timeout (requests' exceptions are
+    OSErrors). Client errors such as 404 or 429 are not failures.
+    """
+    status = getattr(error, 'http_status', None)
+    if status is not None:
+        return status >= 500
+    return isinstance(error, OSError)
+
+
+class CircuitBreaker:
+    """
+    Stops calling Spotify while it is failing.
+
+    After `failures` upstream failures in a row the circuit opens. While
+    open, callers either fail fast with CircuitOpenError or wait until it
+    is time to try again, so a batch import pauses instead of failing
+    every line in turn. After `reset` seconds one probe call is let
+    through (half-open): success closes the circuit, failure opens it
+    again for twice as long (up to five minutes).
+    """
+
+    def __init__(self, failures=5, reset=30.0):
+        if failures < 1:
+            raise ValueError("Failures must be at least 1")
+        self.failures = failures
+        self.reset = float(reset)
+        self.state = CLOSED
+        self._consecutive = 0
+        self._open_for = self.reset
+        self._open_until = 0.0
+        self._probing = False
+        self._trips = 0
+        self._changed = threading.Condition()
+        CIRCUIT_STATE.set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            CIRCUIT_STATE.set(_STATE_VALUES[state])
+            CIRCUIT_TRANSITIONS.inc(state=state)
+            self._changed.notify_all()
+
+    def before_call(self, wait=False, max_wait=None):
+        """
+        Lets a call through, or waits or fails while the circuit is open.
+
+        Args:
+            wait: If True, block until the call may go ahead instead of
+                raising CircuitOpenError
+            max_wait: Longest to block in seconds (None: no limit)
+
+        Returns:
+            True if the call is the half-open probe, whose outcome decides
+            whether the circuit closes; pass it on to record()
+
+        Raises:
+            CircuitOpenError: If the call may not go ahead
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        start = time.monotonic()
+        probe = False
+        with self._changed:
+            while True:
+                now = time.monotonic()
+                if self.state == CLOSED:
+                    break
+                if self.state == OPEN and now >= self._open_until:
+                    self._set_state(HALF_OPEN)
+                if self.state == HALF_OPEN and not self._probing:
+                    self._probing = probe = True
+                    break
+                retry_in = max(0.0, self._open_until - now)
+                if not wait or (deadline is not None and now >= deadline):
+                    CIRCUIT_REJECTED.inc()
+                    raise CircuitOpenError(retry_in)
+                timeout = retry_in if self.state == OPEN else None
+                if deadline is not None:
+                    timeout = min(timeout if timeout is not None else deadline - now, deadline - now)
+                with span('sleep'):
+                    self._changed.wait(timeout)
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            RATE_LIMIT_WAIT.inc(waited)
+        return probe
+
+    def record(self, ok, probe=False):
+        """
+        Records the outcome of a call let through by before_call().
+
+        Only the probe changes an open or half-open circuit. Other calls
+        finishing meanwhile were let through before it tripped, and say
+        nothing about whether Spotify has recovered.
+
+        Args:
+            ok: False if the call failed because Spotify is unhealthy, or
+                None if it never got an answer (e.g. it was interrupted)
+            probe: What before_call() returned for this call
+        """
+        with self._changed:
+            if probe:
+                self._probing = False
+                if ok is None:
+                    # Let another caller probe instead
+                    self._changed.notify_all()
+                    return
+                if ok:
+                    self._consecutive = 0
+                    self._open_for = self.reset
+                    self._set_state(CLOSED)
+                    return
+                self._consecutive += 1
+                self._open_for = min(self._open_for * 2, _MAX_RESET)
+            else:
+                if ok is None or self.state != CLOSED:
+                    return
+                if ok:
+                    self._consecutive = 0
+                    return
+                self._consecutive += 1
+                if self._consecutive < self.failures:
+                    return
+            self._trips += 1
+            self._open_until = time.monotonic() + self._open_for
+            self._set_state(OPEN)
+
+    def stats(self):
+        """Returns the circuit's state as a JSON-friendly dictionary."""
+        with self._changed:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._consecutive,
+                'trips': self._trips,
+                'retry_in': round(max(0.0, self._open_until - time.monotonic()), 1) if self.state == OPEN else 0,
+            }
+
+
+class Hedger:
+    """
+    Sends a second copy of a slow idempotent read and takes whichever
+    answer comes first.
+
+    A call is hedged once it has run longer than the method's recent
+    latency percentile (by default p95, over its last `window` calls).
+    Primary calls run on a pool of their own and duplicates on the hedge
+    pool; the delay counts from when the primary actually starts.
+    Each call earns `budget` of a hedge, so hedges stay a small fraction
+    of traffic even when Spotify slows down as a whole.
+    """
+
+    def __init__(self, budget=0.05, percentile=0.95, min_delay=0.05, window=200, min_samples=20, max_workers=64,
+                 primary_workers=256):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._observed = {}
+        self._delays = {}
+        self._tokens = 0.0
+        self._sent = 0
+        self._won = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        # Primaries get their own, larger pool, so they never queue behind
+        # duplicates; its threads are reused from call to call
+        self._primaries = ThreadPoolExecutor(max_workers=primary_workers, thread_name_prefix='hedge-primary')
+
+    def observe(self, method, seconds):
+        """Records the latency of one successful call."""
+        with self._lock:
+            latencies = self._latencies.get(method)
+            if latencies is None:
+                latencies = self._latencies[method] = deque(maxlen=self.window)
+            latencies.append(seconds)
+            observed = self._observed[method] = self._observed.get(method, 0) + 1
+            # Recompute the threshold now and then, not on every call
+            if len(latencies) >= self.min_samples and observed % 10 == 0:
+                ordered = sorted(latencies)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+                self._delays[method] = max(self.min_delay, ordered[index])
+
+    def delay(self, method):
+        """Returns how long a call may run before it is hedged, or None."""
+        return self._delays.get(method)
+
+    def _take(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._sent += 1
+            return True
+
+    def _timed(self, method, func):
+        start = time.perf_counter()
+        result = func()
+        self.observe(method, time.perf_counter() - start)
+        return result
+
+    def _start(self, method, func):
+        """
+        Runs the primary call on the primary pool.
+
+        Returns:
+            Tuple of (future, started), started being an Event set once a
+            thread has picked the call up: the hedge delay counts from
+            there, so time queued behind other calls never fires a hedge
+        """
+        started = threading.Event()
+
+        def run():
+            started.set()
+            return self._timed(method, func)
+
+        return self._primaries.submit(run), started
+
+    def _send_hedge(self, method, func):
+        """Sends the duplicate, counted like any other Spotify call."""
+        note_call()
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            return self._timed(method, func)
+        except Exception as e:
+            http_status = getattr(e, 'http_status', None)
+            status = str(http_status) if http_status else 'error'
+            raise
+        finally:
+            SPOTIFY_LATENCY.observe(time.perf_counter() - start, method=method)
+            SPOTIFY_CALLS.inc(method=method, status=status)
+
+    def call(self, method, func, before_hedge=None):
+        """
+        Calls func(), hedging it if it is slow.
+
+        Args:
+            method: Spotify method name (latencies are tracked per method)
+            func: Zero-argument callable making the call
+            before_hedge: Called in the hedge's thread before the duplicate
+                is sent, e.g. to wait for the rate limiter
+
+        Returns:
+            The first successful result
+        """
+        with self._lock:
+            self._tokens = min(10.0, self._tokens + self.budget)
+        delay = self.delay(method)
+        if delay is None:
+            return self._timed(method, func)
+
+        primary, started = self._start(method, func)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take():
+            return primary.result()
+
+        # Counted towards the caller's calls (e.g. per web request)
+        @counting_for_caller
+        def hedge():
+            if before_hedge:
+                before_hedge()
+            if primary.done():
+                return _SKIPPED
+            return self._send_hedge(method, func)
+
+        secondary = self._pool.submit(hedge)
+        for future in as_completed((primary, secondary)):
+            if future.exception() is None and future.result() is not _SKIPPED:
+                won = future is secondary
+                HEDGED_CALLS.inc(method=method, result='won' if won else 'lost')
+                if won:
+                    with self._lock:
+                        self._won += 1
+                return future.result()
+        # Both failed, or the primary failed before the hedge was sent
+        HEDGED_CALLS.inc(method=method, result='lost')
+        return primary.result()
+
+    def stats(self):
+        """Returns hedging counters and current thresholds as a dictionary."""
+        with self._lock:
+            return {
+                'sent': self._sent,
+                'won': self._won,
+                'delays_ms': {method: round(delay * 1000) for method, delay in sorted(self._delays.items())},
+            }
+
+
+_breaker = None
+_breaker_options = {'fail_fast': (), 'max_wait': None}
+_hedger = None
+_lock = threading.Lock()
+
+
+def configure_circuit_breaker(failures=5, reset=30.0, fail_fast=(), max_wait=None):
+    """
+    Sets the process-wide Spotify circuit breaker used by core.client.
+
+    Args:
+        failures: Upstream failures in a row that open the circuit, or
+            0 to disable it
+        reset: Seconds the circuit stays open before a probe call
+        fail_fast: Priorities whose calls raise CircuitOpenError while the
+            circuit is open; calls of other priorities wait
+        max_wait: Longest a waiting call blocks, in seconds (None: no limit)
+
+    Returns:
+        The CircuitBreaker object, or None
+    """
+    global _breaker
+    _breaker = CircuitBreaker(failures, reset) if failures else False
+    _breaker_options.update(fail_fast=tuple(fail_fast), max_wait=max_wait)
+    return _breaker or None
+
+
+def get_circuit_breaker():
+    """
+    Returns the process-wide circuit breaker, configured from the
+    environment on first use unless configure_circuit_breaker() was called.
+
+    CIRCUIT_FAILURES sets the failures in a row that open the circuit
+    (0 disables it) and CIRCUIT_RESET_SECONDS how long it stays open.
+    Without configuration every call waits while the circuit is open.
+
+    Returns:
+        CircuitBreaker object, or None if disabled
+    """
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                try:
+                    configure_circuit_breaker(
+                        int(os.getenv('CIRCUIT_FAILURES', '5')),
+                        float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+                    )
+                except ValueError as e:
+                    print(f"✗ Circuit breaker disabled: {e}")
+                    configure_circuit_breaker(0)
+    return _breaker or None
+
+
+def circuit_wait(priority):
+    """
+    Returns (wait, max_wait) for CircuitBreaker.before_call() for a call of
+    the given priority.
+    """
+    return priority not in _breaker_options['fail_fast'], _breaker_options['max_wait']
+
+
+def configure_hedging(budget=0.05):
+    """
+    Sets the process-wide hedging of slow Spotify reads used by core.client.
+
+    Args:
+        budget: Hedges allowed per call (e.g. 0.05 for at most 5%), or 0
+            to disable hedging
+
+    Returns:
+        The Hedger object, or None
+    """
+    global _hedger
+    _hedger = Hedger(budget) if budget else False
+    return _hedger or None
+
+
+def get_hedger():
+    """
+    Returns the process-wide Hedger, configured from HEDGE_BUDGET (hedges
+    per call, default 0.05; 0 disables hedging) on first use unless
+    configure_hedging() was called.
+
+    Returns:
+        Hedger object, or None if disabled
+    """
+    if _hedger is None:
+        with _lock:
+            if _hedger is None:
+                try:
+                    configure_hedging(float(os.getenv('HEDGE_BUDGET', '0.05')))
+                except ValueError as e:
+                    print(f"✗ Hedging disabled: {e}")
+                    configure_hedging(0)
+    return _hedger or None
@@ -1,3 +1,107 @@
+import re
+from itertools import islice
+
+from .cache import is_known_miss, record_miss
+from .catalog import get_local_catalog
+from .coalesce import add_items
+from .tracing import span, traced
+
+
+# spotify:track:ID, https://open.spotify.com/track/ID?si=... (optionally
+# with an intl-xx/ locale segment)
+_TRACK_ID = re.compile(
+    r'^(?:spotify:track:|https?://open\.spotify\.com/(?:intl-[a-z-]+/)?track/)([0-9A-Za-z]{22})(?:[?#].*)?$'
+)
+# Lines read ahead to collect track URIs for one bulk sp.tracks() call
+_PREFETCH_WINDOW = 500
+
+# ISRC: country (2 letters), registrant (3), year (2 digits), designation (5 digits)
+_ISRC = re.compile(r'^(?:isrc:)?\s*([A-Za-z]{2}-?[A-Za-z0-9]{3}-?\d{2}-?\d{5})$', re.IGNORECASE)
+
+
+def parse_track_id(text):
+    """
+    Extracts the track ID from a Spotify track URI or URL.
+    
+    Args:
+        text: Input line
+    
+    Returns:
+        22-character track ID, or None if the line isn't a track URI/URL
+    """
+    match = _TRACK_ID.match(text.strip())
+    return match.group(1) if match else None
+
+
+def parse_isrc(text):
+    """
+    Extracts an ISRC from a line such as "USUM71703861", "isrc:USUM71703861"
+    or "US-UM7-17-03861".
+    
+    Args:
+        text: Input line
+    
+    Returns:
+        Normalized ISRC (upper case, no dashes), or None
+    """
+    match = _ISRC.match(text.strip())
+    return match.group(1).replace('-', '').upper() if match else None
+
+
+@traced('fetch tracks')
+def get_tracks_by_id(sp, track_ids):
+    """
+    Fetches tracks by ID in batches of 50 (one call per batch), which also
+    validates them: IDs Spotify doesn't know come back as None.
+    
+    Args:
+        sp: Spotify client object
+        track_ids: List of track IDs
+    
+    Returns:
+        Dictionary mapping each ID to its track object, or None if unknown
+    """
+    tracks = {}
+    track_ids = list(dict.fromkeys(track_ids))
+    for i in range(0, len(track_ids), 50):
+        batch = track_ids[i:i+50]
+        results = sp.tracks(batch)
+        for track_id, track in zip(batch, results['tracks']):
+            tracks[track_id] = track
+    return tracks
+
+
+def prefetch_tracks(sp, lines, prefetched):
+    """
+    Passes lines through while reading ahead, fetching the tracks of all
+    track URI/URL lines in each window with bulk sp.tracks() calls (50 IDs
+    per call) instead of one call per line.
+
+    Args:
+        sp: Spotify client object
+        lines: Iterable of input lines
+        prefetched: Dictionary filled with track ID to track object (None
+            for IDs Spotify doesn't know)
+
+    Yields:
+        The input lines, unchanged
+    """
+    iterator = iter(lines)
+    while True:
+        window = list(islice(iterator, _PREFETCH_WINDOW))
+        if not window:
+            return
+        track_ids = [track_id for track_id in map(parse_track_id, window) if track_id and track_id not in prefetched]
+        if track_ids:
+            try:
+                prefetched.update(get_tracks_by_id(sp, track_ids))
+            except Exception as e:
+                # Those lines fall back to one lookup each
+                print(f"✗ Bulk track lookup failed: {e}")
+        yield from window
+
+
+@traced('parse')
 def parse_song_input(song_input):
     """
     Parses song input in "Song Name - Artist" format.
@@ -16,18 +120,41 @@ def parse_song_input(song_input):
         return song_input.strip(), None
 
 
-def search_song(sp, song_name, artist_name=None):
+@traced('search')
+def find_track(sp, song_name, artist_name=None):
     """
-    Searches for a song on Spotify.
+    Searches for a song on Spotify without printing anything.
+    
+    A Spotify track URI or URL, or an ISRC, given as the song name is
+    looked up directly instead of searched as text.
     
     Args:
         sp: Spotify client object
-        song_name: Name of the song
+        song_name: Name of the song, or a track URI/URL or ISRC
         artist_name: Name of the artist (optional, for better accuracy)
     
     Returns:
-        Track URI if found, None otherwise
+        Track object if found, None otherwise (also for queries that
+        recently found nothing, see core.cache.record_miss)
     """
+    if not artist_name:
+        track_id = parse_track_id(song_name)
+        if track_id:
+            return get_tracks_by_id(sp, [track_id])[track_id]
+        isrc = parse_isrc(song_name)
+        if isrc:
+            return find_track_by_isrc(sp, isrc)
+    
+    # The local catalog (see core.catalog) answers without an API call
+    catalog = get_local_catalog()
+    if catalog:
+        track = catalog.find_track(song_name, artist_name)
+        if track:
+            return track
+    
+    if is_known_miss('song', song_name, artist_name):
+        return None
+    
     # Build search query
     if artist_name:
         query = f"track:{song_name} artist:{artist_name}"
@@ -48,17 +175,68 @@ def search_song(sp, song_name, artist_name=None):
                 for track in results['tracks']['items']:
                     track_artists = [artist['name'].lower() for artist in track['artists']]
                     if any(artist_name.lower() in artist for artist in track_artists):
-                        print(f"Found: {track['name']} by {', '.join([a['name'] for a in track['artists']])}")
-                        return track['uri']
+                        return track
                 # No exact match found
+                record_miss('song', song_name, artist_name)
                 return None
         
+        return track
+    
+    record_miss('song', song_name, artist_name)
+    return None
+
+
+@traced('search')
+def find_track_by_isrc(sp, isrc):
+    """
+    Looks up a track by its ISRC without printing anything.
+    
+    Args:
+        sp: Spotify client object
+        isrc: International Standard Recording Code, e.g. 'USUM71703861'
+    
+    Returns:
+        Track object if found, None otherwise
+    """
+    if is_known_miss('isrc', isrc):
+        return None
+    
+    results = sp.search(q=f"isrc:{isrc}", type='track', limit=1)
+    if results['tracks']['items']:
+        return results['tracks']['items'][0]
+    
+    record_miss('isrc', isrc)
+    return None
+
+
+def search_song(sp, song_name, artist_name=None, prefetched=None):
+    """
+    Searches for a song on Spotify.
+    
+    Args:
+        sp: Spotify client object
+        song_name: Name of the song
+        artist_name: Name of the artist (optional, for better accuracy)
+        prefetched: Dictionary of track ID to track object already fetched
+            in bulk (see prefetch_tracks())
+    
+    Returns:
+        Track URI if found, None otherwise
+    """
+    track_id = parse_track_id(song_name) if prefetched and not artist_name else None
+    if track_id in (prefetched or {}):
+        track = prefetched[track_id]
+    else:
+        track = find_track(sp, song_name, artist_name)
+    
+    if track:
         print(f"Found: {track['name']} by {', '.join([a['name'] for a in track['artists']])}")
         return track['uri']
     
     return None
 
 
+@traced('write')
 def add_song_to_playlist(sp, playlist_id, track_uri):
     """
     Adds a song to a playlist.
@@ -71,13 +249,13 @@ def add_song_to_playlist(sp, playlist_id, track_uri):
     Returns:
         True if successful, False otherwise
     """
-    try:
-        sp.playlist_add_items(playlist_id, [track_uri])
+    # Shares a call with concurrent adds to the same playlist
+    result = add_items(sp, playlist_id, [track_uri])
+    if result['added']:
         print("✓ Song added to playlist successfully!")
         return True
-    except Exception as e:
-        print(f"✗ Failed to add song: {e}")
-        return False
+    print(f"✗ Failed to add song: {'; '.join(result['errors'])}")
+    return False
 
 
 def add_song_interactive(sp, playlist_id):
@@ -113,7 +291,7 @@ def add_song_interactive(sp, playlist_id):
         return False
 
 
-import time
+from .pacing import pace
 
 
 def add_songs_from_list(sp, playlist_id, song_list):
@@ -133,35 +311,40 @@ def add_songs_from_list(sp, playlist_id, song_list):
     
     print(f"\n=== Adding {len(song_list)} songs to playlist ===\n")
     
-    for i, song_input in enumerate(song_list, 1):
+    # Track URI/URL lines are looked up in bulk, 50 per call
+    prefetched = {}
+    for i, song_input in enumerate(prefetch_tracks(sp, song_list, prefetched), 1):
         song_input = song_input.strip()
         if not song_input:
             continue
         
         print(f"[{i}/{len(song_list)}] Processing: {song_input}")
         
-        song_name, artist_name = parse_song_input(song_input)
-        track_uri = search_song(sp, song_name, artist_name)
-        
-        if track_uri:
-            if add_song_to_playlist(sp, playlist_id, track_uri):
-                successful += 1
+        with span(song_input, 'line'):
+            song_name, artist_name = parse_song_input(song_input)
+            track_uri = search_song(sp, song_name, artist_name, prefetched)
+            
+            if track_uri:
+                if add_song_to_playlist(sp, playlist_id, track_uri):
+                    successful += 1
+                else:
+                    failed.append(song_input)
             else:
+                print(f"✗ Song not found: {song_input}")
                 failed.append(song_input)
-        else:
-            print(f"✗ Song not found: {song_input}")
-            failed.append(song_input)
         
-        # Add delay between songs to avoid rate limiting
-        if i < len(song_list):
+        # Add delay between songs to avoid rate limiting; a prefetched
+        # line made no search call
+        if i < len(song_list) and parse_track_id(song_input) not in prefetched:
             print("Waiting 3 seconds...")
-            time.sleep(3)
+            pace(3)
         
         print()  # Blank line between songs
     
     return successful, failed
 
 
+@traced('parse')
 def read_songs_from_file(file_path):
     """
     Reads songs from a text file.
@@ -188,6 +371,9 @@ def read_songs_from_file(file_path):
 if __name__ == "__main__":
     from core.auth import connect_spotify
     from core.playlist import get_or_create_playlist
+    from core.tracing import profile_from_args
+    
+    profile_from_args("Add songs to a Spotify playlist")
     
     try:
         sp = connect_spotify()
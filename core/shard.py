@@ -0,0 +1,129 @@
+import multiprocessing
+import sys
+from datetime import datetime, timezone
+
+from .auth import connect_spotify
+from .plan import PLAN_VERSION, build_plan
+from .ratelimit import SharedRateLimiter, use_rate_limiter
+from .tracing import collect_timings, merge_timings, timings_active
+
+
+# Each worker gets several smaller shards, so one slow shard (e.g. a
+# prolific artist in 'all' mode) doesn't leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+# Workers start fresh rather than forking, so no SQLite connection or
+# lock from the parent is inherited mid-use.
+_context = multiprocessing.get_context('spawn')
+
+_sp = None
+
+
+def split_shards(lines, count):
+    """
+    Splits lines into contiguous shards of near-equal size.
+
+    Args:
+        lines: List of input lines
+        count: Number of shards
+
+    Returns:
+        List of (start_index, lines) tuples, in input order
+    """
+    count = max(1, min(count, len(lines)))
+    size, extra = divmod(len(lines), count)
+    shards = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append((start, lines[start:end]))
+        start = end
+    return shards
+
+
+def _init_worker(rate, burst, state):
+    """
+    Pool initializer: joins the shared rate budget.
+
+    Nothing here may fail: a pool whose initializer raises keeps
+    respawning workers and never returns a result.
+    """
+    # Keep stdout free for the parent's results; progress goes to stderr
+    sys.stdout = sys.stderr
+    use_rate_limiter(SharedRateLimiter(rate, burst, state=state))
+
+
+def _resolve_shard(job):
+    """Resolves one shard in a worker process, connecting on first use."""
+    global _sp
+    start, lines, plan_type, mode, custom_n, concurrency, timed = job
+    if _sp is None:
+        try:
+            _sp = connect_spotify()
+        except Exception as e:
+            # Every line of the shard fails like a line that errored, and
+            # the next shard tries to connect again
+            print(f"✗ Worker could not connect to Spotify: {e}")
+            return start, [{'input': line, 'uris': [], 'match': None, 'error': str(e)} for line in lines]
+    if not timed:
+        plan = build_plan(_sp, lines, plan_type, mode, custom_n, delay=0, concurrency=concurrency)
+        return start, plan['entries']
+    # Spans stay in this process; the parent's report merges the totals
+    with collect_timings() as totals:
+        plan = build_plan(_sp, lines, plan_type, mode, custom_n, delay=0, concurrency=concurrency)
+    return start, plan['entries'], totals.state()
+
+
+def build_plan_sharded(lines, plan_type, workers, mode='top10', custom_n=None, source=None,
+                       rate=3.0, burst=None, concurrency=1, sp=None):
+    """
+    Resolves lines across several worker processes that share one rate budget.
+
+    The parent connects first (unless given a client), so missing
+    credentials fail before any worker starts and an OAuth prompt, if
+    needed, runs here. Each worker then connects with the cached Spotify
+    token and resolves contiguous shards of the input; the parent merges
+    the plan entries back in input order.
+
+    Args:
+        lines: List of input lines
+        plan_type: 'songs', 'artists', or 'albums'
+        workers: Number of worker processes
+        mode: Artist mode ('top10', 'topn', or 'all')
+        custom_n: Number of songs per artist if mode is 'topn'
+        source: Name of the input file, recorded in the plan
+        rate: Spotify calls per second shared by all workers together
+        burst: Maximum burst size (default: rate)
+        concurrency: Lines resolved at once within each worker
+        sp: Spotify client already connected in this process, or None
+
+    Returns:
+        Plan dictionary, as returned by core.plan.build_plan()
+    """
+    if sp is None:
+        connect_spotify()
+    workers = max(1, min(workers, len(lines)))
+    shards = split_shards(lines, workers * SHARDS_PER_WORKER)
+    limiter = SharedRateLimiter(rate, burst, context=_context)
+
+    print(f"\n=== Resolving {len(lines)} {plan_type} in {workers} processes ===\n")
+
+    timed = timings_active()
+    jobs = [(start, shard, plan_type, mode, custom_n, concurrency, timed) for start, shard in shards]
+    entries = [None] * len(lines)
+
+    with _context.Pool(workers, initializer=_init_worker,
+                       initargs=(rate, burst, limiter.shared_state())) as pool:
+        for start, shard_entries, *timings in pool.imap_unordered(_resolve_shard, jobs):
+            entries[start:start + len(shard_entries)] = shard_entries
+            for state in timings:
+                merge_timings(state)
+
+    return {
+        'version': PLAN_VERSION,
+        'type': plan_type,
+        'mode': mode if plan_type == 'artists' else None,
+        'source': source,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'entries': entries
+    }
@@ -0,0 +1,71 @@
+import copy
+import threading
+
+
+class _Call:
+    """An in-flight call that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    While a call for a given key is running, every other caller asking for
+    the same key waits for it and receives a copy of its result (or its
+    exception) instead of issuing its own call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per key among concurrent callers.
+
+        Args:
+            key: Hashable key identifying the call
+            fn: Zero-argument callable performing the call
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result
+            came from another caller's in-flight call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Followers get their own copy so nobody mutates a shared result
+            return copy.deepcopy(call.result), True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            call.done.set()
+
+        if waiters:
+            return copy.deepcopy(call.result), False
+        return call.result, False
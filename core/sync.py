@@ -0,0 +1,278 @@
+from collections import Counter
+
+from .paginate import fetch_all_pages
+from .plan import plan_uris, read_plan
+from .playlist import add_tracks_in_batches
+from .tracing import span
+
+
+def get_playlist_state(sp, playlist_id):
+    """
+    Reads a playlist's current snapshot and contents.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+
+    Returns:
+        Tuple of (snapshot_id, uris). Unavailable items appear as None so
+        positions line up with the playlist.
+    """
+    with span('fetch playlist'):
+        snapshot_id = sp.playlist(playlist_id, fields='snapshot_id')['snapshot_id']
+        items = fetch_all_pages(
+            lambda offset, limit: sp.playlist_items(
+                playlist_id, fields='items(track(uri)),next,total', limit=limit, offset=offset
+            ),
+            100
+        )
+        uris = []
+        for item in items:
+            track = item.get('track')
+            uris.append(track['uri'] if track else None)
+    return snapshot_id, uris
+
+
+def _increasing_subsequence(order):
+    """
+    Finds a longest increasing subsequence, O(n log n) with predecessor links.
+
+    Returns:
+        Set of the values in it
+    """
+    tails = []
+    tail_positions = []
+    previous = [-1] * len(order)
+    for i, value in enumerate(order):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(tails):
+            tails.append(value)
+            tail_positions.append(i)
+        else:
+            tails[lo] = value
+            tail_positions[lo] = i
+        previous[i] = tail_positions[lo - 1] if lo > 0 else -1
+
+    staying = set()
+    i = tail_positions[-1] if tail_positions else -1
+    while i != -1:
+        staying.add(order[i])
+        i = previous[i]
+    return staying
+
+
+def plan_range_moves(order):
+    """
+    Computes range moves that sort a permutation of target indices.
+
+    Items already next to each other in target order (target indices i,
+    i+1, ... side by side) form runs that move together in one call, and
+    only runs outside a longest increasing subsequence of runs move at
+    all. Each moving run is placed right after its predecessor in target
+    order; going in ascending target order, that predecessor is already
+    in place.
+
+    Args:
+        order: Permutation of 0..n-1: the target index of each item, in
+            current playlist order
+
+    Returns:
+        List of (range_start, insert_before, range_length) moves, in the
+        order they must be applied
+    """
+    # Collapse runs of consecutive target indices; run r holds the items
+    # with target indices firsts[r] .. firsts[r] + lengths[r] - 1
+    firsts = []
+    lengths = []
+    for i, value in enumerate(order):
+        if i and value == order[i - 1] + 1:
+            lengths[-1] += 1
+        else:
+            firsts.append(value)
+            lengths.append(1)
+    ranks = {value: rank for rank, value in enumerate(sorted(firsts))}
+    runs = [ranks[value] for value in firsts]
+    length = {run: size for run, size in zip(runs, lengths)}
+
+    staying = _increasing_subsequence(runs)
+    current = list(runs)
+    moves = []
+    for run in sorted(r for r in runs if r not in staying):
+        start = current.index(run)
+        item_start = sum(length[r] for r in current[:start])
+        del current[start]
+        insert_at = current.index(run - 1) + 1 if run > 0 else 0
+        current.insert(insert_at, run)
+        if insert_at == start:
+            continue
+        item_insert = sum(length[r] for r in current[:insert_at])
+        insert_before = item_insert if item_insert <= item_start else item_insert + length[run]
+        moves.append((item_start, insert_before, length[run]))
+    return moves
+
+
+def compute_sync(current, desired):
+    """
+    Computes the operations that turn one playlist track list into another.
+
+    Tracks not wanted (or present more often than wanted) are removed by URI;
+    the remaining tracks are reordered with the fewest range moves;
+    missing tracks are then inserted at their final positions in runs.
+
+    Args:
+        current: List of URIs currently in the playlist (None for
+            unavailable items, which are kept at the end)
+        desired: List of URIs the playlist should contain, in order
+
+    Returns:
+        Dictionary with 'remove' (URIs), 'moves' ((range_start,
+        insert_before, range_length) triples) and 'inserts' ((position,
+        uris) runs)
+    """
+    wanted = Counter(desired)
+    have = Counter(uri for uri in current if uri)
+
+    # Removing by URI drops every occurrence, so over-represented tracks are
+    # removed entirely and re-inserted as often as wanted
+    remove = [uri for uri in have if have[uri] > wanted[uri]]
+    removed = set(remove)
+    kept = [uri for uri in current if uri not in removed]
+
+    # Give each kept occurrence the index of the matching desired occurrence
+    desired_positions = {}
+    for i, uri in enumerate(desired):
+        desired_positions.setdefault(uri, []).append(i)
+    used = Counter()
+    order = []
+    placed = set()
+    unavailable = 0
+    for uri in kept:
+        if uri is None:
+            # Unavailable items can't be addressed by URI; park them at the end
+            order.append(len(desired) + unavailable)
+            unavailable += 1
+            continue
+        index = desired_positions[uri][used[uri]]
+        used[uri] += 1
+        order.append(index)
+        placed.add(index)
+
+    # Target indices must be contiguous for plan_range_moves, so rank them
+    ranks = {value: rank for rank, value in enumerate(sorted(order))}
+    moves = plan_range_moves([ranks[value] for value in order])
+
+    inserts = []
+    for i, uri in enumerate(desired):
+        if i in placed:
+            continue
+        if inserts and inserts[-1][0] + len(inserts[-1][1]) == i:
+            inserts[-1][1].append(uri)
+        else:
+            inserts.append((i, [uri]))
+
+    return {'remove': remove, 'moves': moves, 'inserts': inserts}
+
+
+def apply_sync(sp, playlist_id, ops, snapshot_id):
+    """
+    Applies operations from compute_sync() in bulk calls. Removals and moves
+    pass the playlist's snapshot_id so each call applies to the version the
+    operations were computed against.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        ops: Operations from compute_sync()
+        snapshot_id: Snapshot the operations were computed against
+
+    Returns:
+        Number of Spotify write calls made
+
+    Raises:
+        RuntimeError: If a run of tracks could not be inserted in full
+    """
+    calls = 0
+
+    with span('write'):
+        remove = ops['remove']
+        for i in range(0, len(remove), 100):
+            result = sp.playlist_remove_all_occurrences_of_items(
+                playlist_id, remove[i:i+100], snapshot_id=snapshot_id
+            )
+            snapshot_id = result['snapshot_id']
+            calls += 1
+        if remove:
+            print(f"✓ Removed {len(remove)} tracks")
+
+        for range_start, insert_before, range_length in ops['moves']:
+            result = sp.playlist_reorder_items(
+                playlist_id, range_start, insert_before, range_length=range_length, snapshot_id=snapshot_id
+            )
+            snapshot_id = result['snapshot_id']
+            calls += 1
+        if ops['moves']:
+            moved = sum(length for _, _, length in ops['moves'])
+            print(f"✓ Moved {moved} tracks in {len(ops['moves'])} calls")
+
+    for position, uris in ops['inserts']:
+        added = add_tracks_in_batches(sp, playlist_id, uris, position=position)
+        calls += (added + 99) // 100
+        if added < len(uris):
+            # Later runs' positions assume this one landed in full
+            raise RuntimeError(
+                f"Only {added}/{len(uris)} tracks inserted at position {position}; "
+                "the playlist is partly synced, run the sync again"
+            )
+
+    return calls
+
+
+def sync_playlist(sp, playlist_id, desired, dry_run=False):
+    """
+    Makes a playlist contain exactly the desired tracks, in order, with the
+    fewest write calls.
+
+    Args:
+        sp: Spotify client object
+        playlist_id: ID of the playlist
+        desired: List of track URIs, in order
+        dry_run: If True, only computes and reports the operations
+
+    Returns:
+        Operations dictionary from compute_sync(), plus 'calls' made
+    """
+    snapshot_id, current = get_playlist_state(sp, playlist_id)
+    ops = compute_sync(current, desired)
+    inserted = sum(len(uris) for _, uris in ops['inserts'])
+
+    print(f"\nPlaylist has {len(current)} tracks, {len(desired)} wanted")
+    print(f"  Remove: {len(ops['remove'])} tracks")
+    print(f"  Move:   {sum(length for _, _, length in ops['moves'])} tracks in {len(ops['moves'])} calls")
+    print(f"  Insert: {inserted} tracks in {len(ops['inserts'])} runs")
+
+    ops['calls'] = 0 if dry_run else apply_sync(sp, playlist_id, ops, snapshot_id)
+    return ops
+
+
+def read_desired_uris(file_path):
+    """
+    Reads a desired track list from a plan file (see core.plan) or a text
+    file with one Spotify track URI per line.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        List of track URIs, in order
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('{'):
+        return plan_uris(read_plan(file_path))
+    return [line.strip() for line in text.splitlines() if line.strip().startswith('spotify:')]
@@ -0,0 +1,358 @@
+import atexit
+import functools
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import current_call_count
+
+
+# Spans are only recorded once enable() has been called (e.g. by --profile)
+_enabled = False
+_spans = []
+_origin = time.perf_counter()
+_local = threading.local()
+
+# Running totals for timing_report(), while one is active
+_report = None
+
+
+def enable():
+    """Starts recording spans."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    """Returns True if spans are being recorded."""
+    return _enabled
+
+
+@contextmanager
+def span(name, category='stage'):
+    """
+    Records how long the enclosed block takes.
+
+    Args:
+        name: Span name, e.g. 'search' or a Spotify method name
+        category: 'stage' for pipeline stages, 'spotify' for API calls,
+            'line' for one input line of a batch
+    """
+    report = _report
+    if not _enabled and report is None:
+        yield
+        return
+    # Time spent in nested stages, for the timing report
+    frame = [category, 0.0]
+    stack = _stack()
+    stack.append(frame)
+    # A line's Spotify calls are read off the thread's call count, which
+    # pool work (pages, related artists, hedges) adds to as well
+    count = current_call_count() if report is not None and category == 'line' else None
+    calls_before = count.value if count else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        if _enabled:
+            _spans.append((name, category, start, duration, threading.get_ident()))
+        if report is not None:
+            if category == 'stage':
+                for outer in reversed(stack):
+                    if outer[0] == 'stage':
+                        outer[1] += duration
+                        break
+            calls = count.value - calls_before if count else 0
+            report.add(name, category, duration, duration - frame[1], calls)
+
+
+def _stack():
+    """Returns this thread's stack of open spans."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def traced(name, category='stage'):
+    """Decorator that records every call of a function as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_chrome_trace(path):
+    """
+    Writes the recorded spans as a Chrome trace (chrome://tracing, Perfetto).
+
+    Args:
+        path: Output JSON file path
+    """
+    pid = os.getpid()
+    events = [
+        {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - _origin) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': pid,
+            'tid': tid,
+        }
+        for name, category, start, duration, tid in list(_spans)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def summarize(category='stage'):
+    """
+    Totals the recorded spans of one category.
+
+    Returns:
+        List of (name, count, total_seconds), slowest first
+    """
+    totals = {}
+    for name, cat, _, duration, _ in list(_spans):
+        if cat == category:
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + duration)
+    return sorted(
+        ((name, count, total) for name, (count, total) in totals.items()),
+        key=lambda x: x[2],
+        reverse=True
+    )
+
+
+def print_summary():
+    """Prints the per-stage and per-Spotify-endpoint time summary."""
+    print("\n" + "=" * 50)
+    print("PROFILE")
+    print("=" * 50)
+    print(f"{'Stage':<20}{'Calls':>8}{'Total (s)':>12}")
+    for name, count, total in summarize('stage'):
+        print(f"{name:<20}{count:>8}{total:>12.2f}")
+
+    calls = summarize('spotify')
+    if calls:
+        print(f"\n{'Spotify call':<20}{'Calls':>8}{'Total (s)':>12}")
+        for name, count, total in calls:
+            print(f"{name:<20}{count:>8}{total:>12.2f}")
+
+
+class TimingTotals:
+    """
+    Running totals of a batch run's spans for the timing report: time per
+    stage (minus the stages nested in it, so e.g. a rate-limit sleep
+    inside a search counts only as sleep), Spotify calls, and the slowest
+    input lines. Memory stays constant however many lines the run has.
+    """
+
+    def __init__(self, slowest=5):
+        self.slowest = slowest
+        self.stages = {}
+        self.api_calls = 0
+        self.api_time = 0.0
+        self.lines = 0
+        self.slow_lines = []
+        self.pids = {os.getpid()}
+        self._lock = threading.Lock()
+
+    def add(self, name, category, duration, exclusive, calls):
+        """Adds one finished span (see span())."""
+        with self._lock:
+            if category == 'stage':
+                count, total = self.stages.get(name, (0, 0.0))
+                self.stages[name] = (count + 1, total + max(0.0, exclusive))
+            elif category == 'spotify':
+                self.api_calls += 1
+                self.api_time += duration
+            elif category == 'line':
+                self.lines += 1
+                self._keep_line((duration, name, calls))
+
+    def _keep_line(self, line):
+        if len(self.slow_lines) < self.slowest:
+            heapq.heappush(self.slow_lines, line)
+        elif line > self.slow_lines[0]:
+            heapq.heapreplace(self.slow_lines, line)
+
+    def state(self):
+        """Returns the totals as plain data, e.g. to send between processes."""
+        with self._lock:
+            return {
+                'stages': dict(self.stages),
+                'api_calls': self.api_calls,
+                'api_time': self.api_time,
+                'lines': self.lines,
+                'slow_lines': list(self.slow_lines),
+                'pids': sorted(self.pids),
+            }
+
+    def merge(self, state):
+        """Adds another process's totals, from state()."""
+        with self._lock:
+            for name, (count, total) in state['stages'].items():
+                own_count, own_total = self.stages.get(name, (0, 0.0))
+                self.stages[name] = (own_count + count, own_total + total)
+            self.api_calls += state['api_calls']
+            self.api_time += state['api_time']
+            self.lines += state['lines']
+            for line in state['slow_lines']:
+                self._keep_line(tuple(line))
+            self.pids.update(state['pids'])
+
+
+def print_timing_report(totals, wall):
+    """
+    Prints where a batch run's time went: per stage (search, fetch, write,
+    sleep, ...), Spotify requests per input line, the slowest lines, and
+    whether the run was bound by the API, by pacing or by local work.
+
+    Args:
+        totals: TimingTotals of the run
+        wall: Wall-clock seconds the run took
+    """
+    stages = totals.stages
+    if not stages:
+        return
+    lines = totals.lines
+    stage_total = sum(total for _, total in stages.values()) or 1.0
+    processes = len(totals.pids)
+
+    print("\n" + "=" * 50)
+    print(
+        f"TIMING ({wall:.1f}s wall"
+        + (f", {lines} lines" if lines else "")
+        + (f", {processes} processes" if processes > 1 else "")
+        + ")"
+    )
+    print("=" * 50)
+    print(f"{'Stage':<20}{'Calls':>8}{'Time (s)':>12}{'Share':>8}")
+    for name, (count, total) in sorted(stages.items(), key=lambda x: x[1][1], reverse=True):
+        print(f"{name:<20}{count:>8}{total:>12.2f}{total / stage_total:>8.0%}")
+
+    api = totals.api_time
+    sleep = stages.get('sleep', (0, 0.0))[1]
+    local = max(0.0, stage_total - api - sleep)
+    print(f"\nSpotify requests: {totals.api_calls}" + (f" ({totals.api_calls / lines:.1f} per line)" if lines else ""))
+    print(f"Spotify API {api:.2f}s, pacing/rate limits {sleep:.2f}s, local work {local:.2f}s")
+    bound = max((api, 'the Spotify API'), (sleep, 'pacing and rate limits'), (local, 'local matching'))[1]
+    print(f"Mostly limited by {bound}")
+
+    if totals.slow_lines:
+        print("\nSlowest lines:")
+        for duration, name, calls in sorted(totals.slow_lines, reverse=True):
+            print(f"{duration:>8.2f}s {calls:>4} req  {name}")
+
+
+@contextmanager
+def collect_timings(slowest=5):
+    """
+    Keeps TimingTotals of the spans finished inside the block, without
+    storing the spans themselves.
+
+    Yields:
+        TimingTotals object
+    """
+    global _report
+    previous = _report
+    totals = _report = TimingTotals(slowest)
+    try:
+        yield totals
+    finally:
+        _report = previous
+
+
+def timings_active():
+    """Returns True if a timing report is being collected."""
+    return _report is not None
+
+
+def merge_timings(state):
+    """
+    Adds another process's totals (TimingTotals.state()) to the timing
+    report being collected, if any, e.g. from core.shard's workers.
+    """
+    report = _report
+    if report is not None:
+        report.merge(state)
+
+
+@contextmanager
+def timing_report(slowest=5):
+    """
+    Collects running totals of the enclosed batch run and prints
+    print_timing_report() at the end.
+    """
+    start = time.perf_counter()
+    with collect_timings(slowest) as totals:
+        try:
+            yield
+        finally:
+            print_timing_report(totals, time.perf_counter() - start)
+
+
+def start_profile(path):
+    """
+    Enables tracing and, at exit, writes a Chrome trace to path and
+    prints the per-stage summary. Does nothing if path is None.
+
+    Args:
+        path: Output trace file path, or None
+    """
+    if not path:
+        return
+    enable()
+
+    def finish():
+        print_summary()
+        try:
+            write_chrome_trace(path)
+            print(f"\nTrace written to {path} (open in chrome://tracing or https://ui.perfetto.dev)")
+        except OSError as e:
+            print(f"✗ Could not write trace: {e}")
+
+    atexit.register(finish)
+
+
+def add_profile_argument(parser, default=None):
+    """
+    Adds the --profile [FILE] option to an argparse parser.
+
+    Args:
+        parser: argparse parser or subparser
+        default: Default value (use argparse.SUPPRESS on subparsers so they
+            don't override a --profile given before the subcommand)
+    """
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='profile.json',
+        default=default,
+        metavar='FILE',
+        help="Record a trace of this run to FILE (default: profile.json) and print a per-stage time summary"
+    )
+
+
+def profile_from_args(description):
+    """
+    Parses --profile for the __main__ blocks in core/ and starts profiling.
+
+    Args:
+        description: Description shown in --help
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=description)
+    add_profile_argument(parser)
+    start_profile(parser.parse_args().profile)
@@ -0,0 +1,398 @@
+"""
+Load test for the web app against a local fake Spotify backend.
+
+Starts a fake Spotify Web API with configurable latency, serves web.app
+(in-process with werkzeug, or as a gunicorn subprocess with the given
+--workers/--threads), then drives a weighted mix of /dashboard,
+/api/add-songs, /api/add-artist and /api/add-album at increasing
+concurrency and reports throughput, latency percentiles and error rates.
+
+    python loadtest.py --levels 1,4,16,32 --duration 20 --latency 120
+    python loadtest.py --server gunicorn --workers 2 --threads 4
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+SECRET_KEY = 'loadtest-secret'
+
+# Default request mix: route -> weight
+DEFAULT_MIX = 'dashboard=4,add-songs=3,add-artist=2,add-album=1'
+
+
+# ---------------------------------------------------------------------------
+# Fake Spotify backend
+# ---------------------------------------------------------------------------
+
+def _track(track_id, name, artist):
+    return {
+        'id': track_id,
+        'uri': f'spotify:track:{track_id}',
+        'name': name,
+        'popularity': 50,
+        'artists': [{'name': artist, 'id': 'a' + track_id}],
+    }
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    """Answers the Web API calls the app makes with canned JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.1
+    jitter = 0.25
+    error_rate = 0.0
+    playlists = 120
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        time.sleep(max(0.0, random.gauss(self.latency, self.latency * self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            return self._reply(503, {'error': {'status': 503, 'message': 'fake outage'}})
+
+        url = urlparse(self.path)
+        # spotipy adds a trailing slash to some paths
+        path = url.path.split('/v1', 1)[-1].rstrip('/')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        limit = int(query.get('limit', 20))
+        offset = int(query.get('offset', 0))
+
+        if self.command == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            self.rfile.read(length)
+            if path.endswith('/playlists'):
+                return self._reply(201, {'id': 'pl' + str(random.randrange(10**6)), 'snapshot_id': 's'})
+            return self._reply(201, {'snapshot_id': 's' + str(random.randrange(10**6))})
+
+        if path == '/me':
+            return self._reply(200, {'id': 'loadtest', 'display_name': 'Load Test'})
+
+        if path == '/me/playlists':
+            items = [
+                {'id': f'pl{i}', 'name': f'Playlist {i}', 'snapshot_id': 's'}
+                for i in range(offset, min(offset + limit, self.playlists))
+            ]
+            return self._reply(200, {'items': items, 'total': self.playlists, 'next': None})
+
+        if path == '/search':
+            q = unquote(query.get('q', ''))
+            kind = query.get('type', 'track')
+            artist = (re.search(r'artist:(.+)$', q) or [None, 'Fake Artist'])[1].strip()
+            name = re.sub(r'^\w+:', '', q.split(' artist:')[0]).strip()
+            if kind == 'artist':
+                items = [{'id': f'ar{abs(hash(name)) % 10**6}', 'name': name, 'followers': {'total': 1000}}]
+                return self._reply(200, {'artists': {'items': items}})
+            if kind == 'album':
+                items = [{'id': f'al{abs(hash(q)) % 10**6}', 'name': name, 'artists': [{'name': artist}],
+                          'total_tracks': 12}]
+                return self._reply(200, {'albums': {'items': items}})
+            items = [_track(f't{abs(hash(q)) % 10**8}', name, artist)]
+            return self._reply(200, {'tracks': {'items': items}})
+
+        match = re.match(r'^/artists/([^/]+)/top-tracks$', path)
+        if match:
+            tracks = [_track(f'{match.group(1)}t{i}', f'Top {i}', 'Fake Artist') for i in range(10)]
+            return self._reply(200, {'tracks': tracks})
+
+        match = re.match(r'^/albums/([^/]+)/tracks$', path)
+        if match:
+            total = 12
+            items = [_track(f'{match.group(1)}t{i}', f'Track {i}', 'Fake Artist')
+                     for i in range(offset, min(offset + limit, total))]
+            return self._reply(200, {'items': items, 'total': total, 'next': None})
+
+        return self._reply(404, {'error': {'status': 404, 'message': f'not faked: {path}'}})
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+
+def start_fake_spotify(latency, error_rate=0.0, playlists=120):
+    """
+    Starts the fake Spotify API in a background thread.
+
+    Returns:
+        Tuple of (server, base_url)
+    """
+    handler = type('Handler', (FakeSpotifyHandler,), {
+        'latency': latency, 'error_rate': error_rate, 'playlists': playlists
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/v1/'
+
+
+# ---------------------------------------------------------------------------
+# App under test
+# ---------------------------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"App did not start at {url}")
+
+
+def start_app(args, env):
+    """
+    Serves web.app with the given environment.
+
+    Returns:
+        Tuple of (base_url, stop function)
+    """
+    port = _free_port()
+    base_url = f'http://127.0.0.1:{port}'
+
+    if args.server == 'gunicorn':
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers), '--threads', str(args.threads), 'web.app:app'],
+            env={**os.environ, **env}, cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        _wait_for(base_url + '/')
+        return base_url, lambda: (process.terminate(), process.wait())
+
+    os.environ.update(env)
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from web.app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    # The app reports progress with print(); keep it out of the results
+    sys.stdout = open(os.devnull, 'w')
+    server = make_server('127.0.0.1', port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _wait_for(base_url + '/')
+    return base_url, server.shutdown
+
+
+def session_cookie():
+    """Builds a signed Flask session cookie holding a fake token."""
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+
+    app = Flask('loadtest')
+    app.secret_key = SECRET_KEY
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    return 'session=' + serializer.dumps({'token_info': {'access_token': 'loadtest-token'}})
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+# ---------------------------------------------------------------------------
+
+def _request_for(route, songs_per_request):
+    """Returns (method, path, json body) for one request of a route."""
+    n = random.randrange(10**9)
+    if route == 'dashboard':
+        return 'GET', '/dashboard', None
+    if route == 'add-songs':
+        songs = [f'Song {n}-{i} - Artist {n % 500}' for i in range(songs_per_request)]
+        return 'POST', '/api/add-songs', {'playlist_id': 'pl1', 'songs': songs}
+    if route == 'add-artist':
+        return 'POST', '/api/add-artist', {'playlist_id': 'pl1', 'artist_name': f'Artist {n % 2000}'}
+    if route == 'add-album':
+        return 'POST', '/api/add-album', {'playlist_id': 'pl1', 'album_input': f'Album {n} - Artist {n % 500}'}
+    raise ValueError(f"Unknown route: {route}")
+
+
+def _send(base_url, cookie, method, path, body, timeout):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method)
+    request.add_header('Cookie', cookie)
+    if data is not None:
+        request.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def run_level(base_url, cookie, concurrency, duration, mix, songs_per_request, timeout):
+    """
+    Runs `concurrency` closed-loop clients for `duration` seconds.
+
+    Returns:
+        List of (route, status, latency_seconds) samples
+    """
+    routes, weights = zip(*mix.items())
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        local = []
+        while time.monotonic() < deadline:
+            route = random.choices(routes, weights)[0]
+            method, path, body = _request_for(route, songs_per_request)
+            start = time.perf_counter()
+            status = _send(base_url, cookie, method, path, body, timeout)
+            local.append((route, status, time.perf_counter() - start))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, duration):
+    """
+    Summarizes samples.
+
+    Returns:
+        Dictionary with 'requests', 'rps', 'p50', 'p95', 'p99' (ms) and 'error_rate'
+    """
+    latencies = sorted(latency for _, _, latency in samples)
+    errors = sum(1 for _, status, _ in samples if not 200 <= status < 400)
+    return {
+        'requests': len(samples),
+        'rps': len(samples) / duration if duration else 0.0,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'error_rate': errors / len(samples) if samples else 0.0,
+    }
+
+
+def parse_mix(spec):
+    """Parses 'dashboard=4,add-songs=3' into a route -> weight dictionary."""
+    mix = {}
+    for part in spec.split(','):
+        route, _, weight = part.partition('=')
+        _request_for(route.strip(), 1)  # validates the route name
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test the web app against a fake Spotify API")
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help="Concurrency levels to run (default: 1,2,4,8,16,32)")
+    parser.add_argument('--duration', type=float, default=15, help="Seconds per level (default: 15)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Route weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--songs-per-request', type=int, default=5, help="Songs per /api/add-songs request (default: 5)")
+    parser.add_argument('--latency', type=float, default=100, help="Fake Spotify latency in ms (default: 100)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of fake Spotify calls failing with 503")
+    parser.add_argument('--server', choices=['werkzeug', 'gunicorn'], default='werkzeug',
+                        help="How to serve the app (default: werkzeug, in-process)")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers (default: 2)")
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker (default: 4)")
+    parser.add_argument('--call-rate', help="SPOTIFY_CALL_RATE for the app (default: the app's own default)")
+    parser.add_argument('--cache', action='store_true', help="Keep the lookup cache enabled (default: disabled)")
+    parser.add_argument('--timeout', type=float, default=30, help="Client timeout per request in seconds (default: 30)")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.levels.split(',')]
+
+    fake, api_url = start_fake_spotify(args.latency / 1000, args.error_rate)
+    env = {
+        'SPOTIFY_API_URL': api_url,
+        'FLASK_SECRET_KEY': SECRET_KEY,
+        'CATALOG_PATH': '',
+        'HTTP_CACHE_PATH': '',
+    }
+    if not args.cache:
+        env['LOOKUP_CACHE_PATH'] = ''
+    if args.call_rate is not None:
+        env['SPOTIFY_CALL_RATE'] = args.call_rate
+
+    # The in-process app silences stdout, so results go to the original one
+    report = functools.partial(print, file=sys.stdout, flush=True)
+    base_url, stop = start_app(args, env)
+    cookie = session_cookie()
+    results = []
+
+    if not args.json:
+        server = f"gunicorn {args.workers}x{args.threads}" if args.server == 'gunicorn' else "werkzeug (threaded)"
+        report(f"Server: {server}, fake Spotify latency {args.latency:.0f} ms, mix {args.mix}\n")
+        report(f"{'clients':>7} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    try:
+        for concurrency in levels:
+            samples = run_level(base_url, cookie, concurrency, args.duration, mix,
+                                args.songs_per_request, args.timeout)
+            summary = summarize(samples, args.duration)
+            summary['concurrency'] = concurrency
+            summary['routes'] = {
+                route: summarize([s for s in samples if s[0] == route], args.duration) for route in mix
+            }
+            results.append(summary)
+            if not args.json:
+                report(f"{concurrency:>7} {summary['requests']:>9} {summary['rps']:>8.1f} {summary['p50']:>8.0f} "
+                      f"{summary['p95']:>8.0f} {summary['p99']:>8.0f} {summary['error_rate']:>6.1%}")
+    finally:
+        stop()
+        fake.shutdown()
+
+    if args.json:
+        report(json.dumps(results, indent=2))
+    elif results:
+        report(f"\nPer route at {results[-1]['concurrency']} clients:")
+        for route, summary in results[-1]['routes'].items():
+            report(f"  {route:<11} {summary['requests']:>6} req  p50 {summary['p50']:>6.0f} ms  "
+                  f"p95 {summary['p95']:>6.0f} ms  p99 {summary['p99']:>6.0f} ms  errors {summary['error_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,29 @@
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from contextlib import redirect_stdout
+from itertools import chain
+
 from core.auth import connect_spotify
-from core.playlist import get_or_create_playlist
+from core.playlist import get_or_create_playlist, find_playlist, create_playlist, list_user_playlists
 from core.search import add_song_interactive, add_songs_from_list, read_songs_from_file
 from core.artist import add_artist_songs_to_playlist, add_artists_from_file
+from core.related import DEFAULT_FAN_OUT, DEFAULT_MAX_ARTISTS, add_related_artists_to_playlist
 from core.album import add_album_to_playlist, add_albums_from_file
+from core.plan import PLAN_TYPES, build_plan, write_plan, read_plan, apply_plan, plan_uris
+from core.headless import OUTPUT_FORMATS, run_batch, format_results
+from core.ratelimit import configure_rate_limit
+from core.shard import build_plan_sharded
+from core.sync import read_desired_uris, sync_playlist
+from core.reorder import REORDER_KEYS, reorder_playlist
+from core.manifest import EXISTING_MODES, load_manifest, build_from_manifest
+from core.cache import list_misses, purge_misses
+from core.export import EXPORT_FORMATS, export_playlists
+from core.inputs import INPUT_FORMATS, iter_input_lines, parse_columns
+from core.catalog import CATALOG_KINDS, LocalCatalog, catalog_path
+from core.tracing import add_profile_argument, start_profile, timing_report
 
 
 def main():
@@ -92,15 +113,16 @@ def add_songs_workflow(sp, playlist_id):
             confirm = input("Proceed to add them? (y/n): ").strip().lower()
             
             if confirm == 'y':
-                successful, failed = add_songs_from_list(sp, playlist_id, songs)
-                
-                print("\n" + "=" * 50)
-                print(f"✓ Successfully added: {successful}/{len(songs)} songs")
-                
-                if failed:
-                    print(f"\n✗ Failed to add ({len(failed)}):")
-                    for song in failed:
-                        print(f"  - {song}")
+                with timing_report():
+                    successful, failed = add_songs_from_list(sp, playlist_id, songs)
+                    
+                    print("\n" + "=" * 50)
+                    print(f"✓ Successfully added: {successful}/{len(songs)} songs")
+                    
+                    if failed:
+                        print(f"\n✗ Failed to add ({len(failed)}):")
+                        for song in failed:
+                            print(f"  - {song}")
         else:
             print("No songs to add.")
     
@@ -118,15 +140,16 @@ def add_songs_workflow(sp, playlist_id):
             songs.append(song)
         
         if songs:
-            successful, failed = add_songs_from_list(sp, playlist_id, songs)
-            
-            print("\n" + "=" * 50)
-            print(f"✓ Successfully added: {successful}/{len(songs)} songs")
-            
-            if failed:
-                print(f"\n✗ Failed to add ({len(failed)}):")
-                for song in failed:
-                    print(f"  - {song}")
+            with timing_report():
+                successful, failed = add_songs_from_list(sp, playlist_id, songs)
+                
+                print("\n" + "=" * 50)
+                print(f"✓ Successfully added: {successful}/{len(songs)} songs")
+                
+                if failed:
+                    print(f"\n✗ Failed to add ({len(failed)}):")
+                    for song in failed:
+                        print(f"  - {song}")
         else:
             print("No songs entered.")
     
@@ -198,8 +221,9 @@ def add_artists_workflow(sp, playlist_id):
         file_path = input("\nEnter the path to your artist list file: ").strip()
         file_path = file_path.strip('"').strip("'")
         
-        total = add_artists_from_file(sp, playlist_id, file_path, mode, custom_n, auto_select=auto_select)
-        print(f"\n✓ Total songs added: {total}")
+        with timing_report():
+            total = add_artists_from_file(sp, playlist_id, file_path, mode, custom_n, auto_select=auto_select)
+            print(f"\n✓ Total songs added: {total}")
     
     else:
         print("Invalid choice.")
@@ -242,12 +266,519 @@ def add_albums_workflow(sp, playlist_id):
         file_path = input("\nEnter the path to your album list file: ").strip()
         file_path = file_path.strip('"').strip("'")
         
-        total = add_albums_from_file(sp, playlist_id, file_path, auto_select=auto_select)
-        print(f"\n✓ Total tracks added: {total}")
+        with timing_report():
+            total = add_albums_from_file(sp, playlist_id, file_path, auto_select=auto_select)
+            print(f"\n✓ Total tracks added: {total}")
     
     else:
         print("Invalid choice.")
 
 
+def plan_command(args):
+    """
+    Resolves an input file into a plan file without touching any playlist.
+    """
+    if args.mode == 'topn' and not args.top_n:
+        print("✗ --top-n is required with --mode topn")
+        return 1
+    
+    try:
+        lines = open_input(args, args.type)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read {args.input}: {e}")
+        return 1
+    if not lines:
+        print("Nothing to resolve.")
+        return 1
+    
+    if args.workers > 1:
+        plan = build_plan_sharded(list(lines), args.type, args.workers, args.mode, args.top_n,
+                                  source=args.input, rate=args.rate)
+    else:
+        sp = connect_spotify()
+        plan = build_plan(sp, lines, args.type, args.mode, args.top_n, source=args.input)
+    write_plan(plan, args.output)
+    
+    resolved = sum(1 for entry in plan['entries'] if entry['uris'])
+    print("\n" + "=" * 50)
+    print(f"✓ Resolved {resolved}/{len(plan['entries'])} lines into {len(plan_uris(plan))} tracks")
+    print(f"✓ Plan written to {args.output}")
+    
+    missing = [entry['input'] for entry in plan['entries'] if not entry['uris']]
+    if missing:
+        print(f"\n✗ Not found ({len(missing)}):")
+        for line in missing:
+            print(f"  - {line}")
+    return 0
+
+
+def apply_command(args):
+    """
+    Writes a plan file to one or more playlists.
+    """
+    try:
+        plan = read_plan(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read plan: {e}")
+        return 1
+    
+    sp = connect_spotify()
+    
+    playlist_ids = []
+    for name_or_id in args.playlist:
+        playlist_id = find_playlist(sp, name_or_id)
+        if not playlist_id:
+            print(f"✗ Playlist not found: {name_or_id}")
+            return 1
+        playlist_ids.append(playlist_id)
+    
+    results = apply_plan(sp, plan, playlist_ids, dedupe=not args.keep_duplicates)
+    
+    print("\n" + "=" * 50)
+    for name_or_id, playlist_id in zip(args.playlist, playlist_ids):
+        print(f"✓ {name_or_id}: added {results[playlist_id]} tracks")
+    return 0
+
+
+def sync_command(args):
+    """
+    Makes a playlist match a plan file or a list of track URIs exactly.
+    """
+    try:
+        desired = read_desired_uris(args.source)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read {args.source}: {e}")
+        return 1
+    
+    sp = connect_spotify()
+    playlist_id = find_playlist(sp, args.playlist)
+    if not playlist_id:
+        print(f"✗ Playlist not found: {args.playlist}")
+        return 1
+    
+    try:
+        ops = sync_playlist(sp, playlist_id, desired, dry_run=args.dry_run)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    
+    print("\n" + "=" * 50)
+    if args.dry_run:
+        print("Dry run: no changes made")
+    else:
+        print(f"✓ Playlist synced in {ops['calls']} write calls")
+    return 0
+
+
+def reorder_command(args):
+    """
+    Sorts a playlist in place with the fewest range moves.
+    """
+    sp = connect_spotify()
+    playlist_id = find_playlist(sp, args.playlist)
+    if not playlist_id:
+        print(f"✗ Playlist not found: {args.playlist}")
+        return 1
+    
+    try:
+        result = reorder_playlist(sp, playlist_id, by=args.by, reverse=args.reverse, dry_run=args.dry_run)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+    
+    print("\n" + "=" * 50)
+    if args.dry_run:
+        print("Dry run: no changes made")
+    else:
+        print(f"✓ Playlist reordered in {result['calls']} reorder calls")
+    return 0
+
+
+def manifest_command(args):
+    """
+    Creates and fills every playlist defined in a manifest file.
+    
+    Exit codes: 0 if every playlist was filled with every source, 2 if a
+    playlist failed or some sources resolved to nothing, 1 if the
+    manifest could not be read.
+    """
+    try:
+        specs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read manifest: {e}")
+        return 1
+    
+    configure_rate_limit(args.rate)
+    sp = connect_spotify()
+    results = build_from_manifest(sp, specs, concurrency=args.concurrency, existing=args.existing)
+    
+    print("\n" + "=" * 50)
+    for result in results:
+        if result.get('error'):
+            print(f"✗ {result['name']}: {result['error']}" + (f" (ID: {result['playlist_id']})" if result['playlist_id'] else ""))
+        else:
+            print(f"✓ {result['name']}: {result['tracks']} tracks (ID: {result['playlist_id']})")
+        for line in result['missing']:
+            print(f"  ✗ Not found: {line}")
+    failed = any(result.get('error') or result['missing'] for result in results)
+    return 2 if failed else 0
+
+
+def misses_command(args):
+    """
+    Lists or purges cached "no match" outcomes.
+    """
+    if args.action == 'purge':
+        if args.query and not args.kind:
+            print("✗ --query needs --kind")
+            return 1
+        try:
+            count = purge_misses(args.kind, args.query)
+        except sqlite3.Error as e:
+            print(f"✗ Could not purge cached misses: {e}")
+            return 1
+        print(f"✓ Purged {count} cached misses")
+        return 0
+    
+    try:
+        misses = list_misses(args.kind)
+    except sqlite3.Error as e:
+        print(f"✗ Could not read cached misses: {e}")
+        return 1
+    if args.format == 'jsonl':
+        for miss in misses:
+            print(json.dumps(miss, ensure_ascii=False))
+        return 0
+    
+    for miss in misses:
+        hours = max(0, miss['expires'] - time.time()) / 3600
+        print(f"{miss['kind']:<7} {miss['query']}  (retried in {hours:.1f}h)")
+    print(f"\n{len(misses)} cached misses")
+    return 0
+
+
+def catalog_command(args):
+    """
+    Imports dumps into the local catalog, or shows what it holds.
+    """
+    path = catalog_path()
+    if not path:
+        # Lookups would never read it
+        print("✗ The local catalog is disabled (CATALOG_PATH is empty)")
+        return 1
+    try:
+        catalog = LocalCatalog(path)
+    except sqlite3.Error as e:
+        print(f"✗ Could not open the catalog {path}: {e}")
+        return 1
+    
+    if args.action == 'import':
+        if not args.files:
+            print("✗ No dump files given")
+            return 1
+        for file_path in args.files:
+            try:
+                count = catalog.import_dump(file_path, args.kind)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"✗ Could not import {file_path}: {e}")
+                return 1
+            print(f"✓ {file_path}: imported {count} entries")
+    
+    try:
+        counts = catalog.counts()
+    except sqlite3.Error as e:
+        print(f"✗ Could not read the catalog {path}: {e}")
+        return 1
+    print(f"\nCatalog {path}: " + ', '.join(f"{counts.get(kind, 0)} {kind}s" for kind in CATALOG_KINDS))
+    return 0
+
+
+def export_command(args):
+    """
+    Exports playlists item by item, skipping those unchanged since the
+    last export to the same directory.
+    """
+    if not args.playlist and not args.all:
+        print("✗ Name playlists to export, or use --all")
+        return 1
+    
+    sp = connect_spotify()
+    playlists = list_user_playlists(sp)
+    if not args.all:
+        selected = []
+        for name_or_id in args.playlist:
+            match = next((p for p in playlists if p['id'] == name_or_id), None) or \
+                next((p for p in playlists if p['name'].lower() == name_or_id.lower()), None)
+            if not match:
+                print(f"✗ Playlist not found: {name_or_id}")
+                return 1
+            selected.append(match)
+        playlists = selected
+    
+    try:
+        results = export_playlists(sp, playlists, args.output, args.format, force=args.force)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    
+    exported = sum(1 for result in results if result['status'] == 'exported')
+    unchanged = sum(1 for result in results if result['status'] == 'unchanged')
+    failed = len(results) - exported - unchanged
+    print("\n" + "=" * 50)
+    print(f"✓ Exported {exported} playlists, {unchanged} unchanged" + (f", {failed} failed" if failed else ""))
+    return 0 if not failed else 2
+
+
+def related_command(args):
+    """
+    Adds songs from seed artists and their related artists, crawled
+    breadth-first, to a playlist.
+    """
+    if args.mode == 'topn' and not args.top_n:
+        print("✗ --top-n is required with --mode topn")
+        return 1
+    try:
+        seeds = list(open_input(args, 'artists'))
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read {args.input}: {e}")
+        return 1
+    if not seeds:
+        print("✗ No seed artists")
+        return 1
+    
+    configure_rate_limit(args.rate)
+    sp = connect_spotify()
+    
+    playlist_id = find_playlist(sp, args.playlist)
+    if not playlist_id:
+        if not args.create:
+            print(f"✗ Playlist not found: {args.playlist} (use --create to create it)")
+            return 1
+        playlist_id = create_playlist(sp, args.playlist)
+    
+    with timing_report():
+        result = add_related_artists_to_playlist(
+            sp, playlist_id, seeds,
+            depth=args.depth,
+            fan_out=args.fan_out,
+            max_artists=args.max_artists,
+            mode=args.mode,
+            custom_n=args.top_n
+        )
+        
+        print("\n" + "=" * 50)
+        print(f"✓ Added {result['tracks_added']}/{result['tracks_found']} tracks from {len(result['artists'])} artists")
+        for artist in result['artists']:
+            print(f"  {'  ' * artist['depth']}{artist['name']}" + (f" (via {artist['via']})" if artist['via'] else ""))
+        for name in result['missing']:
+            print(f"✗ Seed not found: {name}")
+    return 0 if not result['missing'] else 2
+
+
+def open_input(args, plan_type):
+    """
+    Streams input lines from a text, CSV, TSV or JSONL file (or stdin if
+    the path is '-'), applying --input-format, --columns and --split-artists.
+    
+    The first line is read right away, so a missing file or a bad column
+    mapping fails here rather than halfway through a run.
+    
+    Returns:
+        Iterator of lines, or an empty list if the input has none
+    """
+    lines = iter_input_lines(
+        args.input, plan_type, args.input_format, parse_columns(args.columns), args.split_artists
+    )
+    first = next(lines, None)
+    return [] if first is None else chain([first], lines)
+
+
+def batch_command(args):
+    """
+    Runs a songs/artists/albums batch without any prompts.
+    Progress goes to stderr; results go to stdout in the chosen format.
+    
+    Exit codes: 0 if every line resolved, 2 if some lines failed,
+    1 if the batch could not run.
+    """
+    if args.mode == 'topn' and not args.top_n:
+        print("✗ --top-n is required with --mode topn", file=sys.stderr)
+        return 1
+    
+    with redirect_stdout(sys.stderr):
+        try:
+            lines = open_input(args, args.command)
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not read {args.input}: {e}")
+            return 1
+        if not lines:
+            print("✗ No input lines")
+            return 1
+        
+        configure_rate_limit(args.rate)
+        sp = connect_spotify()
+        
+        playlist_id = find_playlist(sp, args.playlist)
+        if not playlist_id:
+            if not args.create:
+                print(f"✗ Playlist not found: {args.playlist} (use --create to create it)")
+                return 1
+            playlist_id = create_playlist(sp, args.playlist)
+        
+        with timing_report():
+            batch = run_batch(
+                sp, lines, args.command, playlist_id,
+                mode=args.mode,
+                custom_n=args.top_n,
+                concurrency=args.concurrency,
+                dedupe=args.dedupe,
+                workers=args.workers,
+                rate=args.rate
+            )
+    
+    print(format_results(batch, args.format))
+    return 0 if batch['resolved'] == batch['total'] else 2
+
+
+def add_input_arguments(parser):
+    """Adds the options describing a tabular or JSONL input file."""
+    parser.add_argument('--input-format', choices=INPUT_FORMATS,
+                        help="Input format (default: from the file extension; text for stdin)")
+    parser.add_argument('--columns',
+                        help="Column mapping for CSV/TSV/JSONL, e.g. 'name=Track Name,artist=Artist Name(s),isrc=ISRC'")
+    parser.add_argument('--split-artists', action='store_true',
+                        help="Keep only the first artist when the artist column lists several (split on ; , & feat.)")
+
+
+def build_parser():
+    """
+    Builds the command-line parser. Without a subcommand the interactive
+    menu runs.
+    """
+    parser = argparse.ArgumentParser(description="Spotify Playlist Manager")
+    add_profile_argument(parser)
+    subparsers = parser.add_subparsers(dest='command')
+    
+    plan_parser = subparsers.add_parser('plan', help="Resolve an input file into a plan file of track URIs")
+    plan_parser.add_argument('input', help="Input file: text (one song, artist or album per line), CSV, TSV or JSONL")
+    add_input_arguments(plan_parser)
+    plan_parser.add_argument('--type', choices=PLAN_TYPES, default='songs', help="What each line is (default: songs)")
+    plan_parser.add_argument('--mode', choices=['top10', 'topn', 'all'], default='top10', help="Artist mode (default: top10)")
+    plan_parser.add_argument('--top-n', type=int, help="Songs per artist with --mode topn")
+    plan_parser.add_argument('-o', '--output', default='plan.json', help="Plan file to write (default: plan.json)")
+    plan_parser.add_argument('--workers', type=int, default=1, help="Processes resolving lines, sharing one --rate budget (default: 1)")
+    plan_parser.add_argument('--rate', type=float, default=3.0, help="Maximum Spotify calls per second with --workers (default: 3)")
+    add_profile_argument(plan_parser, default=argparse.SUPPRESS)
+    
+    apply_parser = subparsers.add_parser('apply', help="Write a plan file to one or more playlists")
+    apply_parser.add_argument('plan', help="Plan file written by 'plan'")
+    apply_parser.add_argument('--playlist', action='append', required=True, help="Playlist name or ID (repeat for several)")
+    apply_parser.add_argument('--keep-duplicates', action='store_true', help="Add tracks that appear more than once in the plan")
+    add_profile_argument(apply_parser, default=argparse.SUPPRESS)
+    
+    sync_parser = subparsers.add_parser('sync', help="Make a playlist match a plan file or URI list exactly")
+    sync_parser.add_argument('source', help="Plan file, or text file with one spotify:track URI per line")
+    sync_parser.add_argument('--playlist', required=True, help="Playlist name or ID")
+    sync_parser.add_argument('--dry-run', action='store_true', help="Only show the operations")
+    add_profile_argument(sync_parser, default=argparse.SUPPRESS)
+    
+    reorder_parser = subparsers.add_parser('reorder', help="Sort a playlist in place with the fewest moves")
+    reorder_parser.add_argument('--playlist', required=True, help="Playlist name or ID")
+    reorder_parser.add_argument('--by', choices=list(REORDER_KEYS), default='popularity',
+                                help="Sort key (default: popularity, most popular first; others ascending)")
+    reorder_parser.add_argument('--reverse', action='store_true', help="Flip the sort direction")
+    reorder_parser.add_argument('--dry-run', action='store_true', help="Only show how many moves it takes")
+    add_profile_argument(reorder_parser, default=argparse.SUPPRESS)
+    
+    manifest_parser = subparsers.add_parser('manifest', help="Create many playlists from a manifest file")
+    manifest_parser.add_argument('manifest', help="Manifest JSON file")
+    manifest_parser.add_argument('--concurrency', type=int, default=4, help="Lookups and playlists processed at once (default: 4)")
+    manifest_parser.add_argument('--rate', type=float, default=3.0, help="Maximum Spotify calls per second (default: 3)")
+    manifest_parser.add_argument('--existing', choices=EXISTING_MODES, default='create',
+                                 help="When a playlist name already exists: create another, append to it, or sync it (default: create)")
+    add_profile_argument(manifest_parser, default=argparse.SUPPRESS)
+    
+    misses_parser = subparsers.add_parser('misses', help="List or purge cached 'not found' lookups")
+    misses_parser.add_argument('action', choices=['list', 'purge'], help="What to do")
+    misses_parser.add_argument('--kind', choices=['song', 'isrc', 'artist', 'album'], help="Only this kind of lookup")
+    misses_parser.add_argument('--query', help="Only this query with purge, e.g. 'Song - Artist'")
+    misses_parser.add_argument('--format', choices=['text', 'jsonl'], default='text', help="Output format for list (default: text)")
+    
+    export_parser = subparsers.add_parser('export', help="Export playlist items to JSONL, CSV or Parquet files")
+    export_parser.add_argument('playlist', nargs='*', help="Playlist names or IDs")
+    export_parser.add_argument('--all', action='store_true', help="Export all of your playlists")
+    export_parser.add_argument('-o', '--output', default='export', help="Output directory (default: export)")
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='jsonl', help="File format (default: jsonl)")
+    export_parser.add_argument('--force', action='store_true', help="Export playlists even if unchanged since the last export")
+    add_profile_argument(export_parser, default=argparse.SUPPRESS)
+    
+    catalog_parser = subparsers.add_parser('catalog', help="Build or inspect the local catalog used before live searches")
+    catalog_parser.add_argument('action', choices=['import', 'stats'], help="What to do")
+    catalog_parser.add_argument('files', nargs='*', help="Dump files (.jsonl, .csv or .tsv) to import")
+    catalog_parser.add_argument('--kind', choices=CATALOG_KINDS, help="What CSV/TSV rows are (JSONL objects carry their type)")
+    
+    related_parser = subparsers.add_parser('related', help="Add songs from seed artists and their related artists")
+    related_parser.add_argument('input', help="Seed artists: text (one per line), CSV, TSV or JSONL ('-' for stdin)")
+    add_input_arguments(related_parser)
+    related_parser.add_argument('--playlist', required=True, help="Playlist name or ID to add to")
+    related_parser.add_argument('--create', action='store_true', help="Create the playlist if it doesn't exist")
+    related_parser.add_argument('--depth', type=int, default=1, help="Layers of related artists to crawl (default: 1)")
+    related_parser.add_argument('--fan-out', type=int, default=DEFAULT_FAN_OUT,
+                                help=f"New artists taken from each artist's related list (default: {DEFAULT_FAN_OUT})")
+    related_parser.add_argument('--max-artists', type=int, default=DEFAULT_MAX_ARTISTS,
+                                help=f"Most artists used, seeds included (default: {DEFAULT_MAX_ARTISTS})")
+    related_parser.add_argument('--mode', choices=['top10', 'topn', 'all'], default='top10', help="Songs per artist (default: top10)")
+    related_parser.add_argument('--top-n', type=int, help="Songs per artist with --mode topn")
+    related_parser.add_argument('--rate', type=float, default=3.0, help="Maximum Spotify calls per second (default: 3)")
+    add_profile_argument(related_parser, default=argparse.SUPPRESS)
+    
+    # Headless batch commands: never prompt, machine-readable output
+    batch_options = argparse.ArgumentParser(add_help=False)
+    batch_options.add_argument('input', help="Input file: text (one entry per line), CSV, TSV or JSONL ('-' for stdin)")
+    add_input_arguments(batch_options)
+    batch_options.add_argument('--playlist', required=True, help="Playlist name or ID to add to")
+    batch_options.add_argument('--create', action='store_true', help="Create the playlist if it doesn't exist")
+    batch_options.add_argument('--concurrency', type=int, default=1, help="Lines resolved at once (default: 1)")
+    batch_options.add_argument('--workers', type=int, default=1, help="Processes resolving lines, sharing one --rate budget (default: 1)")
+    batch_options.add_argument('--rate', type=float, default=3.0, help="Maximum Spotify calls per second (default: 3)")
+    batch_options.add_argument('--format', choices=OUTPUT_FORMATS, default='text', help="Output format (default: text)")
+    batch_options.add_argument('--dedupe', action='store_true', help="Add each track only once")
+    add_profile_argument(batch_options, default=argparse.SUPPRESS)
+    
+    songs_parser = subparsers.add_parser('songs', parents=[batch_options], help="Add songs ('Song - Artist' per line) without prompts")
+    songs_parser.set_defaults(mode='top10', top_n=None)
+    artists_parser = subparsers.add_parser('artists', parents=[batch_options], help="Add songs by artist (one artist per line) without prompts")
+    artists_parser.add_argument('--mode', choices=['top10', 'topn', 'all'], default='top10', help="Artist mode (default: top10)")
+    artists_parser.add_argument('--top-n', type=int, help="Songs per artist with --mode topn")
+    albums_parser = subparsers.add_parser('albums', parents=[batch_options], help="Add albums ('Album - Artist' per line) without prompts")
+    albums_parser.set_defaults(mode='top10', top_n=None)
+    
+    return parser
+
+
 if __name__ == "__main__":
-    main()
+    args = build_parser().parse_args()
+    start_profile(args.profile)
+    
+    if args.command == 'plan':
+        raise SystemExit(plan_command(args))
+    elif args.command == 'apply':
+        raise SystemExit(apply_command(args))
+    elif args.command == 'sync':
+        raise SystemExit(sync_command(args))
+    elif args.command == 'reorder':
+        raise SystemExit(reorder_command(args))
+    elif args.command == 'manifest':
+        raise SystemExit(manifest_command(args))
+    elif args.command == 'export':
+        raise SystemExit(export_command(args))
+    elif args.command == 'catalog':
+        raise SystemExit(catalog_command(args))
+    elif args.command == 'misses':
+        raise SystemExit(misses_command(args))
+    elif args.command == 'related':
+        raise SystemExit(related_command(args))
+    elif args.command in PLAN_TYPES:
+        raise SystemExit(batch_command(args))
+    else:
+        main()
@@ -1,19 +1,24 @@
-from flask import Flask, render_template, redirect, url_for, request, session, jsonify
+from flask import Flask, Response, render_template, redirect, url_for, request, session, jsonify, g, stream_with_context
+import json
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add parent directory to path to import core modules
 sys.path.append(str(Path(__file__).parent.parent))
 
 from core.auth import connect_spotify
+from core.client import wrap_client
+from core import metrics
+from core.ratelimit import configure_rate_limit
+from core.resilience import CircuitOpenError, configure_circuit_breaker, get_circuit_breaker, get_hedger
 from core.playlist import list_user_playlists, create_playlist
-from core.search import parse_song_input, search_song, add_song_to_playlist, add_songs_from_list
+from core.search import parse_song_input, prefetch_tracks, search_song, add_song_to_playlist, add_songs_from_list
 from core.artist import search_artist, add_artist_songs_to_playlist
+from core.related import DEFAULT_FAN_OUT, DEFAULT_MAX_ARTISTS, add_related_artists_to_playlist
 from core.album import parse_album_input, search_album, add_album_to_playlist
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -27,6 +32,25 @@ SPOTIPY_CLIENT_ID = os.getenv('SPOTIPY_CLIENT_ID')
 SPOTIPY_CLIENT_SECRET = os.getenv('SPOTIPY_CLIENT_SECRET')
 SPOTIPY_REDIRECT_URI = os.getenv('SPOTIPY_REDIRECT_URI_WEB', 'http://127.0.0.1:5000/callback')
 SCOPE = 'playlist-modify-public playlist-modify-private'
+# Alternative Web API base URL, e.g. the fake backend in loadtest.py
+SPOTIFY_API_URL = os.getenv('SPOTIFY_API_URL')
+
+# Spotify calls per second for this worker. Interactive requests are served
+# first; bulk imports share what's left, fairly between users. 0 disables.
+configure_rate_limit(float(os.getenv('SPOTIFY_CALL_RATE', '10')))
+
+# With gunicorn, every worker has its own metrics; METRICS_DIR (a directory
+# shared by the workers) makes /metrics report all of them combined
+metrics.share_across_processes(os.getenv('METRICS_DIR'))
+
+# While Spotify is failing, interactive requests get a 503 at once; bulk
+# imports pause until it recovers, for up to CIRCUIT_MAX_WAIT seconds.
+configure_circuit_breaker(
+    int(os.getenv('CIRCUIT_FAILURES', '5')),
+    float(os.getenv('CIRCUIT_RESET_SECONDS', '30')),
+    fail_fast=('interactive',),
+    max_wait=float(os.getenv('CIRCUIT_MAX_WAIT', '60'))
+)
 
 
 def get_spotify_client():
@@ -35,10 +59,152 @@ def get_spotify_client():
     if not token_info:
         return None
     
-    sp = spotipy.Spotify(auth=token_info['access_token'])
+    import spotipy
+    
+    client = spotipy.Spotify(auth=token_info['access_token'])
+    if SPOTIFY_API_URL:
+        client.prefix = SPOTIFY_API_URL
+    sp = wrap_client(client)
     return sp
 
 
+def error_response(e):
+    """JSON error for a failed API request; 503 while Spotify is down."""
+    if isinstance(e, CircuitOpenError):
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(max(1, round(e.retry_in)))
+        return response, 503
+    return jsonify({'error': str(e)}), 500
+
+
+def bounded_int(data, key, default, cap):
+    """
+    Reads a non-negative integer option from a request body, clamped to
+    at most cap; missing or 0 means default.
+
+    Raises:
+        ValueError: If the value is not a number
+    """
+    value = data.get(key)
+    try:
+        value = int(value or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number") from None
+    return min(max(0, value) or default, cap)
+
+
+def wants_stream():
+    """True if the client asked for NDJSON, one result per input line."""
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+
+def line_results(lines, process):
+    """
+    Processes input lines one at a time.
+
+    Args:
+        lines: Input lines
+        process: Function (line) -> (status, tracks added), where status
+            is 'added', 'not_found' or 'failed'
+
+    Yields:
+        One result dict per non-empty line, then {'summary': {...}}
+    """
+    total = resolved = added = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        total += 1
+        try:
+            status, count = process(line)
+            result = {'input': line, 'status': status, 'added': count}
+        except Exception as e:
+            result = {'input': line, 'status': 'error', 'added': 0, 'error': str(e)}
+        resolved += result['status'] == 'added'
+        added += result['added']
+        yield result
+    yield {'summary': {'total': total, 'resolved': resolved, 'added': added}}
+
+
+def stream_response(results):
+    """
+    Streams results from line_results() as NDJSON, each line sent as soon
+    as it is ready. Only the totals are kept, so memory stays flat however
+    long the batch is. Request latency metrics cover the first byte only.
+    """
+    def generate():
+        for result in results:
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def batch_response(results):
+    """Collects line_results() into one JSON response."""
+    results = list(results)
+    summary = results.pop()['summary']
+    return jsonify({'success': True, **summary, 'results': results})
+
+
+def get_spotify_oauth():
+    """Build the OAuth helper for the web flow (no file cache)."""
+    from spotipy.oauth2 import SpotifyOAuth
+    
+    return SpotifyOAuth(
+        client_id=SPOTIPY_CLIENT_ID,
+        client_secret=SPOTIPY_CLIENT_SECRET,
+        redirect_uri=SPOTIPY_REDIRECT_URI,
+        scope=SCOPE,
+        cache_path=None  # Don't use file cache for web
+    )
+
+
+@app.before_request
+def start_timer():
+    """Record when the request started for latency metrics."""
+    g.request_start = time.perf_counter()
+    metrics.reset_call_count()
+    metrics.start_sharing()
+
+
+@app.after_request
+def record_latency(response):
+    """Observe request latency per route."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_LATENCY.observe(
+            time.perf_counter() - start,
+            route=route,
+            method=request.method,
+            status=response.status_code
+        )
+        metrics.HTTP_SPOTIFY_CALLS.observe(metrics.call_count(), route=route)
+    return response
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for this worker."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/status')
+def status_endpoint():
+    """Circuit breaker and hedging state for this worker."""
+    breaker = get_circuit_breaker()
+    hedger = get_hedger()
+    return jsonify({
+        'circuit': breaker.stats() if breaker else None,
+        'hedging': hedger.stats() if hedger else None
+    })
+
+
 @app.route('/')
 def index():
     """Home page."""
@@ -48,13 +214,7 @@ def index():
 @app.route('/login')
 def login():
     """Initiate Spotify OAuth flow."""
-    sp_oauth = SpotifyOAuth(
-        client_id=SPOTIPY_CLIENT_ID,
-        client_secret=SPOTIPY_CLIENT_SECRET,
-        redirect_uri=SPOTIPY_REDIRECT_URI,
-        scope=SCOPE,
-        cache_path=None  # Don't use file cache for web
-    )
+    sp_oauth = get_spotify_oauth()
     auth_url = sp_oauth.get_authorize_url()
     return redirect(auth_url)
 
@@ -62,13 +222,7 @@ def login():
 @app.route('/callback')
 def callback():
     """Handle Spotify OAuth callback."""
-    sp_oauth = SpotifyOAuth(
-        client_id=SPOTIPY_CLIENT_ID,
-        client_secret=SPOTIPY_CLIENT_SECRET,
-        redirect_uri=SPOTIPY_REDIRECT_URI,
-        scope=SCOPE,
-        cache_path=None
-    )
+    sp_oauth = get_spotify_oauth()
     
     code = request.args.get('code')
     token_info = sp_oauth.get_access_token(code)
@@ -103,7 +257,7 @@ def get_playlists():
         playlists = list_user_playlists(sp)
         return jsonify({'playlists': playlists})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 
 @app.route('/api/playlists/create', methods=['POST'])
@@ -122,7 +276,7 @@ def create_playlist_api():
         playlist_id = create_playlist(sp, name, description, public)
         return jsonify({'success': True, 'playlist_id': playlist_id})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 
 @app.route('/api/add-songs', methods=['POST'])
@@ -136,23 +290,37 @@ def add_songs_api():
     playlist_id = data.get('playlist_id')
     songs = data.get('songs', [])
     
+    # A pasted list is a bulk import; a single song stays interactive
+    if len(songs) > 1:
+        sp.priority = 'bulk'
+    
     if not playlist_id or not songs:
         return jsonify({'error': 'Missing playlist_id or songs'}), 400
     
+    # Track URI/URL lines are looked up in bulk as the list is read
+    prefetched = {}
+    
+    def add_song(song_input):
+        song_name, artist_name = parse_song_input(song_input)
+        track_uri = search_song(sp, song_name, artist_name, prefetched)
+        if not track_uri:
+            return 'not_found', 0
+        if add_song_to_playlist(sp, playlist_id, track_uri):
+            return 'added', 1
+        return 'failed', 0
+    
+    if wants_stream():
+        return stream_response(line_results(prefetch_tracks(sp, songs, prefetched), add_song))
+    
     try:
         # Process songs without the interactive parts
         successful = 0
         failed = []
         
-        for song_input in songs:
-            song_name, artist_name = parse_song_input(song_input.strip())
-            track_uri = search_song(sp, song_name, artist_name)
-            
-            if track_uri:
-                if add_song_to_playlist(sp, playlist_id, track_uri):
-                    successful += 1
-                else:
-                    failed.append(song_input)
+        for song_input in prefetch_tracks(sp, songs, prefetched):
+            status, _ = add_song(song_input.strip())
+            if status == 'added':
+                successful += 1
             else:
                 failed.append(song_input)
         
@@ -163,12 +331,16 @@ def add_songs_api():
             'total': len(songs)
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 
 @app.route('/api/add-artist', methods=['POST'])
 def add_artist_api():
-    """API endpoint to add songs from an artist."""
+    """
+    API endpoint to add songs from an artist, or from each of a list of
+    artists ('artist_names', one result per artist). With 'related_depth'
+    the artists' related artists are added too (see core.related).
+    """
     sp = get_spotify_client()
     if not sp:
         return jsonify({'error': 'Not authenticated'}), 401
@@ -176,13 +348,55 @@ def add_artist_api():
     data = request.json
     playlist_id = data.get('playlist_id')
     artist_name = data.get('artist_name')
+    artist_names = data.get('artist_names')
     mode = data.get('mode', 'top10')
     custom_n = data.get('custom_n')
     auto_select = data.get('auto_select', True)  # Default to auto for web
     
-    if not playlist_id or not artist_name:
+    if not playlist_id or not (artist_name or artist_names):
         return jsonify({'error': 'Missing playlist_id or artist_name'}), 400
     
+    # Fetching an artist's whole discography, or many artists, is a bulk job
+    if mode == 'all' or (artist_names and len(artist_names) > 1):
+        sp.priority = 'bulk'
+    
+    # Expanding to related artists crawls and adds many artists at once;
+    # the web caps keep one request's crawl bounded
+    try:
+        related_depth = bounded_int(data, 'related_depth', 0, 3)
+        fan_out = bounded_int(data, 'fan_out', DEFAULT_FAN_OUT, 20)
+        max_artists = bounded_int(data, 'max_artists', DEFAULT_MAX_ARTISTS, 100)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if related_depth > 0:
+        sp.priority = 'bulk'
+        try:
+            result = add_related_artists_to_playlist(
+                sp, playlist_id, artist_names or [artist_name],
+                depth=related_depth,
+                fan_out=fan_out,
+                max_artists=max_artists,
+                mode=mode,
+                custom_n=custom_n,
+                auto_select=auto_select
+            )
+            return jsonify({
+                'success': True,
+                'added': result['tracks_added'],
+                'artists': [artist['name'] for artist in result['artists']],
+                'missing': result['missing']
+            })
+        except Exception as e:
+            return error_response(e)
+    
+    def add_artist(name):
+        added = add_artist_songs_to_playlist(sp, playlist_id, name, mode, custom_n, auto_select)
+        return ('added' if added else 'not_found'), added
+    
+    if artist_names:
+        results = line_results(artist_names, add_artist)
+        return stream_response(results) if wants_stream() else batch_response(results)
+    
     try:
         added = add_artist_songs_to_playlist(sp, playlist_id, artist_name, mode, custom_n, auto_select)
         return jsonify({
@@ -190,12 +404,15 @@ def add_artist_api():
             'added': added
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 
 @app.route('/api/add-album', methods=['POST'])
 def add_album_api():
-    """API endpoint to add tracks from an album."""
+    """
+    API endpoint to add tracks from an album, or from each of a list of
+    albums ('album_inputs', one result per album).
+    """
     sp = get_spotify_client()
     if not sp:
         return jsonify({'error': 'Not authenticated'}), 401
@@ -203,11 +420,23 @@ def add_album_api():
     data = request.json
     playlist_id = data.get('playlist_id')
     album_input = data.get('album_input')
+    album_inputs = data.get('album_inputs')
     auto_select = data.get('auto_select', True)  # Default to auto for web
     
-    if not playlist_id or not album_input:
+    if not playlist_id or not (album_input or album_inputs):
         return jsonify({'error': 'Missing playlist_id or album_input'}), 400
     
+    if album_inputs and len(album_inputs) > 1:
+        sp.priority = 'bulk'
+    
+    def add_album(line):
+        added = add_album_to_playlist(sp, playlist_id, line, auto_select)
+        return ('added' if added else 'not_found'), added
+    
+    if album_inputs:
+        results = line_results(album_inputs, add_album)
+        return stream_response(results) if wants_stream() else batch_response(results)
+    
     try:
         added = add_album_to_playlist(sp, playlist_id, album_input, auto_select)
         return jsonify({
@@ -215,7 +444,7 @@ def add_album_api():
             'added': added
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 
 @app.route('/logout')
@@ -10,6 +10,76 @@ async function apiCall(endpoint, data) {
     return await response.json();
 }
 
+// Streaming API helper: posts data and calls onResult for each NDJSON
+// line as it arrives. Returns the final summary object.
+async function streamCall(endpoint, data, onResult) {
+    const response = await fetch(endpoint, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/x-ndjson'
+        },
+        body: JSON.stringify(data)
+    });
+
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!response.ok || !contentType.includes('application/x-ndjson')) {
+        const result = await response.json();
+        throw new Error(result.error || `HTTP ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let summary = null;
+
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const item = JSON.parse(line);
+        if (item.summary) {
+            summary = item.summary;
+        } else {
+            onResult(item);
+        }
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();  // Keep the incomplete last line
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+
+    if (!summary) {
+        throw new Error('Connection closed before the batch finished');
+    }
+    return summary;
+}
+
+// Progress bar with a status line for streamed batches
+function showProgress(elementId, done, total, label) {
+    document.getElementById(elementId).innerHTML = `
+        <div class="progress">
+            <div class="progress-bar progress-bar-striped progress-bar-animated" style="width: ${Math.round(100 * done / total)}%"></div>
+        </div>
+        <p class="text-muted mt-2">Processed ${done} of ${total}${label ? ': ' + label : ''}</p>
+    `;
+}
+
+// One line of a streamed batch result
+function describeResult(result, unit) {
+    if (result.status === 'added') {
+        return `✓ ${result.input}: ${result.added} ${unit}`;
+    }
+    if (result.status === 'error') {
+        return `✗ ${result.input}: ${result.error}`;
+    }
+    return `✗ ${result.input}: ${result.status === 'failed' ? 'could not be added' : 'not found'}`;
+}
+
 // Create playlist
 async function createPlaylist() {
     const name = document.getElementById('newPlaylistName').value.trim();
@@ -60,35 +130,41 @@ async function addSongs() {
     document.getElementById('addSongsBtn').disabled = true;
 
     try {
-        const result = await apiCall('/api/add-songs', {
+        let processed = 0;
+        const failed = [];
+
+        // Results arrive one song at a time as each lookup finishes
+        const summary = await streamCall('/api/add-songs', {
             playlist_id: window.selectedPlaylistId,
             songs
+        }, (result) => {
+            processed++;
+            if (result.status !== 'added') {
+                failed.push(describeResult(result, 'song'));
+            }
+            showProgress('songsProgress', processed, songs.length, result.input);
         });
 
         document.getElementById('songsProgress').style.display = 'none';
         document.getElementById('addSongsBtn').disabled = false;
 
-        if (result.success) {
-            let html = `<div class="alert alert-success">
-                ✓ Successfully added ${result.added} out of ${result.total} songs
-            </div>`;
-
-            if (result.failed.length > 0) {
-                html += `<div class="alert alert-warning">
-                    Failed to add ${result.failed.length} songs:<br>
-                    <small>${result.failed.join('<br>')}</small>
-                </div>`;
-            }
+        let html = `<div class="alert alert-success">
+            ✓ Successfully added ${summary.added} out of ${summary.total} songs
+        </div>`;
 
-            document.getElementById('songsResult').innerHTML = html;
-            document.getElementById('songsInput').value = '';
-        } else {
-            document.getElementById('songsResult').innerHTML = `<div class="alert alert-danger">Error: ${result.error}</div>`;
+        if (failed.length > 0) {
+            html += `<div class="alert alert-warning">
+                Failed to add ${failed.length} songs:<br>
+                <small>${failed.join('<br>')}</small>
+            </div>`;
         }
+
+        document.getElementById('songsResult').innerHTML = html;
+        document.getElementById('songsInput').value = '';
     } catch (error) {
         document.getElementById('songsProgress').style.display = 'none';
         document.getElementById('addSongsBtn').disabled = false;
-        document.getElementById('songsResult').innerHTML = `<div class="alert alert-danger">Error: ${error}</div>`;
+        document.getElementById('songsResult').innerHTML = `<div class="alert alert-danger">Error: ${error.message || error}</div>`;
     }
 }
 
@@ -114,45 +190,31 @@ async function addArtists() {
 
     // Show progress
     document.getElementById('artistProgress').style.display = 'block';
+    showProgress('artistProgress', 0, artists.length, artists[0].trim());
     document.getElementById('artistResult').innerHTML = '';
     document.getElementById('addArtistBtn').disabled = true;
 
     try {
-        let totalAdded = 0;
-        let results = [];
-
-        for (let i = 0; i < artists.length; i++) {
-            const artist = artists[i].trim();
-            if (!artist) continue;
-
-            document.getElementById('artistProgress').innerHTML = `
-                <div class="progress">
-                    <div class="progress-bar progress-bar-striped progress-bar-animated" style="width: 100%"></div>
-                </div>
-                <p class="text-muted mt-2">Processing ${i + 1} of ${artists.length}: ${artist}</p>
-            `;
-
-            const result = await apiCall('/api/add-artist', {
-                playlist_id: window.selectedPlaylistId,
-                artist_name: artist,
-                mode,
-                custom_n: customN,
-                auto_select: true
-            });
-
-            if (result.success) {
-                totalAdded += result.added;
-                results.push(`✓ ${artist}: ${result.added} songs`);
-            } else {
-                results.push(`✗ ${artist}: ${result.error}`);
-            }
-        }
+        let processed = 0;
+        const results = [];
+
+        const summary = await streamCall('/api/add-artist', {
+            playlist_id: window.selectedPlaylistId,
+            artist_names: artists,
+            mode,
+            custom_n: customN,
+            auto_select: true
+        }, (result) => {
+            processed++;
+            results.push(describeResult(result, 'songs'));
+            showProgress('artistProgress', processed, artists.length, result.input);
+        });
 
         document.getElementById('artistProgress').style.display = 'none';
         document.getElementById('addArtistBtn').disabled = false;
 
         let html = `<div class="alert alert-success">
-            ✓ Successfully added ${totalAdded} total songs from ${artists.length} artists
+            ✓ Successfully added ${summary.added} total songs from ${summary.total} artists
         </div>`;
 
         html += '<div class="alert alert-info"><small>' + results.join('<br>') + '</small></div>';
@@ -162,7 +224,7 @@ async function addArtists() {
     } catch (error) {
         document.getElementById('artistProgress').style.display = 'none';
         document.getElementById('addArtistBtn').disabled = false;
-        document.getElementById('artistResult').innerHTML = `<div class="alert alert-danger">Error: ${error}</div>`;
+        document.getElementById('artistResult').innerHTML = `<div class="alert alert-danger">Error: ${error.message || error}</div>`;
     }
 }
 
@@ -183,43 +245,29 @@ async function addAlbums() {
 
     // Show progress
     document.getElementById('albumProgress').style.display = 'block';
+    showProgress('albumProgress', 0, albums.length, albums[0].trim());
     document.getElementById('albumResult').innerHTML = '';
     document.getElementById('addAlbumBtn').disabled = true;
 
     try {
-        let totalAdded = 0;
-        let results = [];
-
-        for (let i = 0; i < albums.length; i++) {
-            const album = albums[i].trim();
-            if (!album) continue;
-
-            document.getElementById('albumProgress').innerHTML = `
-                <div class="progress">
-                    <div class="progress-bar progress-bar-striped progress-bar-animated" style="width: 100%"></div>
-                </div>
-                <p class="text-muted mt-2">Processing ${i + 1} of ${albums.length}: ${album}</p>
-            `;
-
-            const result = await apiCall('/api/add-album', {
-                playlist_id: window.selectedPlaylistId,
-                album_input: album,
-                auto_select: true
-            });
-
-            if (result.success) {
-                totalAdded += result.added;
-                results.push(`✓ ${album}: ${result.added} tracks`);
-            } else {
-                results.push(`✗ ${album}: ${result.error}`);
-            }
-        }
+        let processed = 0;
+        const results = [];
+
+        const summary = await streamCall('/api/add-album', {
+            playlist_id: window.selectedPlaylistId,
+            album_inputs: albums,
+            auto_select: true
+        }, (result) => {
+            processed++;
+            results.push(describeResult(result, 'tracks'));
+            showProgress('albumProgress', processed, albums.length, result.input);
+        });
 
         document.getElementById('albumProgress').style.display = 'none';
         document.getElementById('addAlbumBtn').disabled = false;
 
         let html = `<div class="alert alert-success">
-            ✓ Successfully added ${totalAdded} total tracks from ${albums.length} albums
+            ✓ Successfully added ${summary.added} total tracks from ${summary.total} albums
         </div>`;
 
         html += '<div class="alert alert-info"><small>' + results.join('<br>') + '</small></div>';
@@ -229,6 +277,6 @@ async function addAlbums() {
     } catch (error) {
         document.getElementById('albumProgress').style.display = 'none';
         document.getElementById('addAlbumBtn').disabled = false;
-        document.getElementById('albumResult').innerHTML = `<div class="alert alert-danger">Error: ${error}</div>`;
+        document.getElementById('albumResult').innerHTML = `<div class="alert alert-danger">Error: ${error.message || error}</div>`;
     }
 }